@@ -3,16 +3,40 @@ from __future__ import annotations
 import json
 import os
 from datetime import datetime as dt
+from functools import lru_cache
+from importlib.util import find_spec
 from typing import Type
 
 from application import db
 from application.models import WorkOrder
 
+# orjson is optional, it parses machines.json faster than json
+ORJSON_INSTALLED = find_spec('orjson') is not None
+
 
 def get_default_machines_from_json() -> dict[str, dict[str, bool]]:
     json_file = os.environ['MACHINES_JSON']
+    # keyed by modification time, so edits to machines.json are picked up
+    return _load_machines_json(json_file, os.stat(json_file).st_mtime_ns)
+
+
+@lru_cache(maxsize=4)
+def _load_machines_json(
+    json_file: str, mtime_ns: int
+) -> dict[str, dict[str, bool]]:
+    """Parses the machines.json file once per modification.
+    The returned dict is shared and must not be modified.
+    """
+    if ORJSON_INSTALLED:
+        import orjson
+        with open(json_file, 'rb') as j:
+            default_machines: dict[str, dict[str, bool]] = (
+                orjson.loads(j.read())
+            )
+        return default_machines
+
     with open(json_file, 'r') as j:
-        default_machines: dict[str, dict[str, bool]] = json.load(j)
+        default_machines = json.load(j)
     return default_machines
 
 
@@ -35,6 +59,8 @@ def machine_list(machine_family: str) -> list[Machine]:
 
 class Machine:
 
+    __slots__ = ('short_name', 'name', 'id')
+
     short_name: str
     name: str
     id: str
@@ -157,6 +183,8 @@ class Machine:
 
 
 class iTrak(Machine):
+    __slots__ = ()
+
     def __init__(self: iTrak, machine: str) -> None:
         self.short_name = machine
         self.name = self.short_name.replace('line', 'Line ')
@@ -167,6 +195,8 @@ class iTrak(Machine):
 
 
 class Dipstick(Machine):
+    __slots__ = ()
+
     def __init__(self: Dipstick, machine_id: str) -> None:
         self.short_name = machine_id
         self.name = self.short_name.replace('dipstick', 'Dipstick ')
@@ -177,6 +207,8 @@ class Dipstick(Machine):
 
 
 class Swab(Machine):
+    __slots__ = ()
+
     def __init__(self: Swab, machine_id: str) -> None:
         self.short_name = machine_id
         self.name = self.short_name.replace('swab', 'Swab Poucher ')
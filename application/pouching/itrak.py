@@ -37,6 +37,10 @@ class iTrak:
     IDEAL_RUN_RATE_HZ = 140 / 60
     STANDARD_RATE_HZ = 5000 / 3600
 
+    __slots__ = (
+        'number', 'name', 'machine_info', 'data_folder', 'product_inspect'
+    )
+
     def __init__(self: iTrak, line_number: int) -> None:
         self.number = line_number
         self.name = f'Line {self.number}'
@@ -406,16 +406,14 @@ class Schedule:
             year_week=current_week.next_week,
             machine_family=self.machine_family
         )
-        _frame = pd.concat([
-            CurrentSchedule(machine_family=self.machine_family).schedule_frame,
-            week_2_obj.schedule_frame
-        ])
         week_3_obj = Schedule(
             year_week=week_2_obj.next_week,
             machine_family=self.machine_family
         )
         _frame = pd.concat([
-            _frame, week_3_obj.schedule_frame
+            current_week.schedule_frame,
+            week_2_obj.schedule_frame,
+            week_3_obj.schedule_frame
         ])
         return _frame
 
@@ -1,6 +1,8 @@
 import copy
 import datetime
 import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from warnings import filterwarnings
 
 import matplotlib.dates as mdates
@@ -8,6 +10,8 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+from application.vision._kernels import NUMBA_INSTALLED, cycle_kernel
+
 PD_PATH = '//kansas.us/qfs/Engineering/Process_Data'
 # OUL_PATH = '//kansas.us/qfs/Engineering/Shared/Online Utilization Logs'
 
@@ -16,6 +20,9 @@ PD_PATH = '//kansas.us/qfs/Engineering/Process_Data'
 OUL_PATH = './'
 NOW_TS = datetime.datetime.now().strftime('%Y%m%d%H%M%S')
 
+# max number of process data files read at once
+MAX_LOAD_WORKERS = 8
+
 
 class Machine:
 
@@ -51,48 +58,54 @@ class Machine:
         # short DataBlock for quicker testing, use 10/11/22 for date
         # data = pd.read_csv('short_db.txt', names=data_labels)
 
-        # load empty dataframe with the given columns
-        data = pd.DataFrame(columns=data_labels)
-
-
-        for file in process_data_files:
-            # loop through the process data files and
-            # concatenate them into a single DataFrame
+        def read_file(file):
+            # read file into DataFrame if it exists, timestamps are
+            # parsed here so each worker converts its own file
             try:
-                # read file into DataFrame if it exists
-                df = pd.read_csv(file, names=data_labels)
+                return pd.read_csv(
+                    file, names=data_labels, parse_dates=['t_stamp'],
+                    engine='c', low_memory=False
+                )
             except FileNotFoundError:
                 # if no file found, output to terminal
                 print(f'No process data found: {file}')
-                continue
-            
-            # concatenate each file to 'data'
-            data = pd.concat([data, df])
+                return None
+
+        # reads the process data files concurrently, one per day;
+        # map() keeps the results in the same order as the days
+        frames = []
+        workers = min(MAX_LOAD_WORKERS, len(process_data_files))
+        if workers > 0:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                frames = [
+                    frame for frame
+                    in executor.map(read_file, process_data_files)
+                    if frame is not None
+                ]
 
-            # clears the DataFrame for the next iteration
-            df.drop(df.index, inplace=True)
+        # concatenate the files into a single DataFrame at once,
+        # or load empty dataframe with the given columns
+        if frames:
+            data = pd.concat(frames, ignore_index=True, copy=False)
+        else:
+            data = pd.DataFrame(columns=data_labels)
 
-        # converts the 't_stamp' column of data
-        # from a string object to a datetime object
-        data['datetime'] = pd.to_datetime(data['t_stamp'])
+        # the 't_stamp' column is already parsed to datetimes,
+        # only the empty fallback frame still needs converting
+        if not pd.api.types.is_datetime64_dtype(data['t_stamp']):
+            data['t_stamp'] = pd.to_datetime(data['t_stamp'])
 
-        # sets the datetime column as the DataFrame index,
+        # moves the timestamps into the DataFrame index,
         # very useful for slicing data by date and time
-        data = data.set_index('datetime')
-
-        # drops DataFrame rows that represent cycles
-        # which are outside of the given time range
-        data.drop(
-            data[data.index < t_start].index, axis=0, inplace=True
-                )
-        data.drop(
-            data[data.index > t_end].index, axis=0, inplace=True
-                )
+        data = data.set_index('t_stamp').rename_axis('datetime')
 
-        # drops the string-type timestamp column from the DataFrame
-        data.drop(['t_stamp'], axis=1, inplace=True)
+        # keeps only the cycles within the given time range,
+        # slicing a sorted index is a binary search, not a full scan
+        if not data.index.is_monotonic_increasing:
+            data = data.sort_index(kind='stable')
 
-        return data
+        # copied so columns can be added without modifying the slice
+        return data.loc[t_start:t_end].copy()
 
     @staticmethod
     def get_labels(process_id, label_id):
@@ -222,40 +235,12 @@ class iTrakPoucher:
         
         """
         self.hour_list = pd.date_range(self.startup, self.shutdown, freq='h')
-        self.hour_blocks = []
-
-        for hour in self.hour_list:
-            hour_start_time = hour
-            hour_end_time = hour + datetime.timedelta(hours=1)
-            self.hour_blocks.append(
-                DataBlock(
-                    self.MACHINE_ID, self.PROCESS_ID, 
-                    hour_start_time, hour_end_time
-                )
-            )
-        
-        for hour_block in self.hour_blocks:
-            hour_block.data = self.workday.data[
-                (
-                    self.workday.data.index >= hour_block.t_start
-                    ) & (
-                        self.workday.data.index < hour_block.t_end
-                        )
-                ]
-            hour_block.stops = self.workday.stops[
-                (
-                    self.workday.stops.index >= hour_block.t_start
-                    ) & (
-                        self.workday.stops.index < hour_block.t_end
-                        )
-                ]
-            hour_block.yields = self.workday.yields[
-                (
-                    self.workday.yields.index >= hour_block.t_start
-                    ) & (
-                        self.workday.yields.index < hour_block.t_end
-                        )
-                ]
+
+        # hour blocks are views of the already loaded workday data
+        self.hour_blocks = [
+            self.workday.sub_block(hour, hour + datetime.timedelta(hours=1))
+            for hour in self.hour_list
+        ]
 
     def slice_shifts(self):
 
@@ -264,35 +249,12 @@ class iTrakPoucher:
         
         """
 
-        self.first_shift = DataBlock(self.MACHINE_ID, self.PROCESS_ID, self.startup, self.shift_change)
-        self.second_shift = DataBlock(self.MACHINE_ID, self.PROCESS_ID, self.shift_change, self.shutdown)
-
-        shifts = [self.first_shift, self.second_shift]
-
-        for shift in shifts:
-            shift.data = self.workday.data[
-                (
-                    self.workday.data.index >= shift.t_start
-                    ) & (
-                        self.workday.data.index < shift.t_end
-                        )
-                ]
-
-            shift.stops = self.workday.stops[
-                (
-                    self.workday.stops.index >= shift.t_start
-                    ) & (
-                        self.workday.stops.index < shift.t_end
-                        )
-                ]
-
-            shift.yields = self.workday.yields[
-                (
-                    self.workday.yields.index >= shift.t_start
-                    ) & (
-                        self.workday.yields.index < shift.t_end
-                        )
-                ]
+        self.first_shift = self.workday.sub_block(
+            self.startup, self.shift_change
+        )
+        self.second_shift = self.workday.sub_block(
+            self.shift_change, self.shutdown
+        )
 
 
     def analyze_cycle_data(self):
@@ -307,15 +269,29 @@ class iTrakPoucher:
         """
 
         # adds timestamps to data
-        self.workday.data['t'] = [
-            d.timestamp() for d in self.workday.data.index
-            ]
-
-        # adds 'dt' column to data
-        self.workday.data['dt'] = self.workday.data['t'].diff()
+        t = self.workday.data.index.asi8 / 10 ** 9
+        self.workday.data['t'] = t
+
+        if NUMBA_INSTALLED and len(self.workday.data.index) > 0:
+            # adds cycle time and rate columns from a single pass,
+            # with the kernel shared with the vision module
+            dt, hz = np.empty_like(t), np.empty_like(t)
+            cycle_kernel()(t, dt, hz)
+            self.workday.data['dt'] = dt
+            self.workday.data['Hz'] = hz
+            self.workday.data['upm'] = hz * 60
+            return
+
+        # adds 'dt' column to data, subtracting the shifted views
+        # directly instead of going through Series.diff
+        dt = np.empty_like(t)
+        dt[:1] = np.nan
+        np.subtract(t[1:], t[:-1], out=dt[1:])
+        self.workday.data['dt'] = dt
 
         # adds rate columns to data
-        self.workday.data['Hz'] = 1 / self.workday.data['dt']
+        with np.errstate(divide='ignore'):
+            self.workday.data['Hz'] = 1 / dt
         self.workday.data['upm'] = self.workday.data['Hz'] * 60
 
 
@@ -328,6 +304,24 @@ class iTrakPoucher:
         self.calculate_stats()
         self.find_stops()
         self.calculate_stop_stats()
+        self.frame_stats()
+
+    def frame_stats(self):
+
+        """
+        Builds the stats DataFrame from the collected stat values
+        in one step, labelled columns first.
+
+        """
+        db = self.workday
+
+        columns = db.stat_labels + [
+            stat for stat in db.stat_values if stat not in db.stat_labels
+        ]
+        db.stats = pd.DataFrame(
+            [db.stat_values], index=[f'{self.MACHINE_ID}-{self.date}'],
+            columns=columns
+        )
 
 
     def get_span_stats(self):
@@ -356,29 +350,37 @@ class iTrakPoucher:
 
         db = self.workday
        
-        db.stats = pd.DataFrame(
-            index=[f'{self.MACHINE_ID}-{self.date}'], columns=stats_labels)
+        # stats are collected in a dict and framed once by frame_stats()
+        db.stat_labels = stats_labels
+        db.stat_values = {}
 
         # empty flights
-        db.empties = db.data[db.data['part'] == 0]
-        db.stats['empty'] = db.empties.__len__()
-        db.stats['empty_perc'] = (db.stats['empty'] / db.data.__len__())
+        db.empties = db.data.take(np.flatnonzero(~db.part_mask))
+        db.stat_values['empty'] = db.empties.__len__()
+        db.stat_values['empty_perc'] = (
+            db.stat_values['empty'] / db.data.__len__()
+            )
 
         # parts
-        db.parts = db.data[db.data['part'] != 0]
-        db.stats['parts'] = db.parts.__len__()
+        db.parts = db.data.take(np.flatnonzero(db.part_mask))
+        db.stat_values['parts'] = db.parts.__len__()
         
         # reworks
         db.reworks = db.parts[db.parts.duplicated('serial')]
-        db.stats['reworks'] = db.reworks.__len__()
-        db.stats['rework_perc'] = (db.reworks.__len__() / db.parts.__len__())
+        db.stat_values['reworks'] = db.reworks.__len__()
+        db.stat_values['rework_perc'] = (
+            db.reworks.__len__() / db.parts.__len__()
+            )
 
-        # first and last part
-        db.stats['first_part'] = db.first_part = (min(db.parts.index))
-        db.stats['last_part'] = db.last_part = (max(db.parts.index))
+        # first and last part, the ends of the parts index
+        # (sorted by get_process_data, so no scan is needed)
+        if db.parts.empty:
+            raise ValueError('No parts found in DataBlock.')
+        db.stat_values['first_part'] = db.first_part = db.parts.index[0]
+        db.stat_values['last_part'] = db.last_part = db.parts.index[-1]
 
         # total production time
-        db.stats['total_time'] = db.total_time = (
+        db.stat_values['total_time'] = db.total_time = (
             db.last_part.timestamp() - db.first_part.timestamp()
             )
 
@@ -403,37 +405,43 @@ class iTrakPoucher:
         # set mode to slice or full workday
         db = self.workday
 
-        # # finds short stops
-        db.shortstops = db.data.loc[
-            (db.data['dt'] > self.ss_min) & (db.data['dt'] < self.ms_min)
-            ].drop(['Hz','upm'], axis=1)
+        # cycle times compared once against each bin edge,
+        # rate columns are dropped once for all of the bins
+        cycle_times = db.cycle_times
+        stop_data = db.data.drop(['Hz', 'upm'], axis=1)
+
+        above_ss = cycle_times > self.ss_min
+        above_ms = cycle_times > self.ms_min
+        above_ls = cycle_times > self.ls_min
+        above_xls = cycle_times > self.xls_min
+
+        short_mask = above_ss & (cycle_times < self.ms_min)
+        medium_mask = above_ms & (cycle_times < self.ls_min)
+        long_mask = above_ls & (cycle_times < self.xls_min)
+
+        # finds short stops
+        db.shortstops = stop_data.take(np.flatnonzero(short_mask))
 
         # finds medium stops
-        db.mediumstops = db.data.loc[
-            (db.data['dt'] > self.ms_min) & (db.data['dt'] < self.ls_min)
-            ].drop(['Hz','upm'], axis=1)
+        db.mediumstops = stop_data.take(np.flatnonzero(medium_mask))
 
         # finds long stops
-        db.longstops = db.data.loc[
-            (db.data['dt'] > self.ls_min) & (db.data['dt'] < self.xls_min)
-            ].drop(['Hz','upm'], axis=1)
+        db.longstops = stop_data.take(np.flatnonzero(long_mask))
 
         # finds extra-long stops
-        db.xlongstops = db.data.loc[
-            db.data['dt'] > self.xls_min
-            ].drop(['Hz','upm'], axis=1)
+        db.xlongstops = stop_data.take(np.flatnonzero(above_xls))
 
-        # combine stop bins into single dataframe
-        db.stops = pd.concat(
-            [db.shortstops, db.mediumstops,
-                db.longstops, db.xlongstops]
-            ).sort_index()
+        # combine stop bins into single dataframe, already in time order
+        db.stops = stop_data.take(np.flatnonzero(
+            short_mask | medium_mask | long_mask | above_xls
+        ))
 
         # package stops together for passing to functions
         db.stops_binned = [
             db.shortstops, db.mediumstops,
             db.longstops, db.xlongstops
             ]
+        db.stop_bin_masks = [short_mask, medium_mask, long_mask, above_xls]
 
 
     def calculate_stop_stats(self):
@@ -448,81 +456,84 @@ class iTrakPoucher:
         db = self.workday
         
         # stop parameters
-        db.stats[['ss_min', 'ms_min', 'ls_min', 'xls_min']] = [
-            self.ss_min, self.ms_min, self.ls_min, self.xls_min
-        ]
+        db.stat_values.update(zip(
+            ['ss_min', 'ms_min', 'ls_min', 'xls_min'],
+            [self.ss_min, self.ms_min, self.ls_min, self.xls_min]
+        ))
         
-        # stops - occurrences
-        db.stats[
-            ['ss_count', 'ms_count', 'ls_count', 'xls_count']
-            ] = (
-                [ss_count, ms_count, ls_count, xls_count]
-            ) = [
-                db.shortstops.__len__(),
-                db.mediumstops.__len__(),
-                db.longstops.__len__(),
-                db.xlongstops.__len__()
-        ]
+        # labels each cycle with its stop bin (1-4, 0 for no stop),
+        # the bins do not overlap
+        bin_labels = np.zeros(db.cycle_times.size, dtype=np.intp)
+        for label, mask in enumerate(db.stop_bin_masks, start=1):
+            bin_labels[mask] = label
 
-        # stops - time
-        db.stats[['ss_time', 'ms_time', 'ls_time', 'xls_time']] = (
-            [ss_time, ms_time, ls_time, xls_time]
-        ) = [
-            db.shortstops['dt'].sum(),
-            db.mediumstops['dt'].sum(),
-            db.longstops['dt'].sum(),
-            db.xlongstops['dt'].sum()
-        ]
+        # stops - occurrences
+        db.stat_values.update(zip(
+            ['ss_count', 'ms_count', 'ls_count', 'xls_count'],
+            np.bincount(bin_labels, minlength=5)[1:].tolist()
+        ))
+
+        # stops - time, one weighted count over the cached cycle times
+        bins = [ss_time, ms_time, ls_time, xls_time] = np.bincount(
+            bin_labels, weights=db.cycle_times, minlength=5
+        )[1:].tolist()
+        db.stat_values.update(zip(
+            ['ss_time', 'ms_time', 'ls_time', 'xls_time'], bins
+        ))
 
         # stops - percentage of total time
-        bins = [ss_time, ms_time, ls_time, xls_time]
-        db.stats[['ss_perc', 'ms_perc', 'ls_perc', 'xls_perc']] = [
-            bin/db.total_time for bin in bins
-        ]
+        db.stat_values.update(zip(
+            ['ss_perc', 'ms_perc', 'ls_perc', 'xls_perc'],
+            [bin/db.total_time for bin in bins]
+        ))
 
         # total stop time
-        db.stats['total_stop_time'] = total_stop_time = (
+        db.stat_values['total_stop_time'] = total_stop_time = (
             ss_time + ms_time + ls_time + xls_time
         )
 
         # total stop percentage
-        db.stats['total_stop_perc'] = total_stop_perc = (
+        db.stat_values['total_stop_perc'] = total_stop_perc = (
             total_stop_time / db.total_time
         )
 
         # oee availability rate
-        db.stats['avail_loss'] = avail_loss = (
+        db.stat_values['avail_loss'] = avail_loss = (
             total_stop_time - (ss_time + ms_time)
         )
-        db.stats['oee_net_run_time'] = net_run_time = (
+        db.stat_values['oee_net_run_time'] = net_run_time = (
             db.total_time - avail_loss
         )
-        db.stats['ar'] = net_run_time / db.total_time
+        db.stat_values['ar'] = net_run_time / db.total_time
 
         # oee performance rate
         ideal_run_rate = 140 / 60
-        db.stats['pr'] = (
+        db.stat_values['pr'] = (
             db.parts.__len__() / net_run_time
         ) / ideal_run_rate
 
         # partial oee
-        db.stats['oee_ar_pr_only'] = (
-            db.stats['ar'] * db.stats['pr']
+        db.stat_values['oee_ar_pr_only'] = (
+            db.stat_values['ar'] * db.stat_values['pr']
         )
 
         # total run time
-        db.stats['total_run_time'] = db.total_run_time = (
+        db.stat_values['total_run_time'] = db.total_run_time = (
             db.total_time - total_stop_time
         )
 
         # average rate while running
-        db.stats['avg_rate_upm'] = db.parts.__len__() / (db.total_run_time / 60)
+        db.stat_values['avg_rate_upm'] = (
+            db.parts.__len__() / (db.total_run_time / 60)
+        )
 
         # effective rate over entire day
-        db.stats['eff_rate_upm'] = db.parts.__len__() / (db.total_time / 60)
+        db.stat_values['eff_rate_upm'] = (
+            db.parts.__len__() / (db.total_time / 60)
+        )
 
         # total run percentage
-        db.stats['total_run_perc'] = total_run_perc = (
+        db.stat_values['total_run_perc'] = total_run_perc = (
             db.total_run_time / db.total_time
         )
 
@@ -538,20 +549,17 @@ class iTrakPoucher:
         print(f'{datetime.datetime.now()}: Getting yields.')
 
         db = self.workday
+        seconds = pd.date_range(self.startup, self.shutdown, freq='s')
+
+        # parts made before each second of the day, one binary search
+        # per second over the sorted part times instead of a mask per second
         db.yields = pd.DataFrame(
-            index=pd.date_range(
-                self.startup, self.shutdown, freq='s'
-            ), 
-            columns=['count', 'standard']
+            {
+                'count': db.parts.index.searchsorted(seconds, side='left'),
+                'standard': np.arange(len(seconds)) * self.STD_RATE
+            },
+            index=seconds
             )
-        db.yields.at[db.yields.index[0], 'count'] = 0
-
-        # comprehension list to determine parts made at each second of the day
-        db.yields[['count', 'standard']] = [
-            (
-                db.parts[db.parts.index < x].__len__(), i * self.STD_RATE
-                ) for i, x in enumerate(db.yields.index)
-            ]
 
         db.yields['upm'] = 60 * db.yields['count'].diff()
         db.yields['upm_rolling5s'] = db.yields['upm'].rolling(5).mean()
@@ -969,7 +977,51 @@ class DataBlock:
         self.t_end = t_end
         self.t_start_str = t_start.strftime('%Y%m%d_%H%M%S')
         self.t_end_str = t_end.strftime('%Y%m%d_%H%M%S')
+        self.shift_change = shift_change
 
+    def sub_block(self, t_start, t_end):
+
+        """
+        Returns a DataBlock from time 't_start' up to time 't_end'
+        sharing this DataBlock's loaded data, stops and yields.
+
+        The frames are indexed by sorted datetimes, so each one is
+        sliced positionally after a binary search for the bounds.
+
+        """
+        block = DataBlock(
+            self.machine_id, self.process_id,
+            t_start, t_end, self.shift_change
+        )
+
+        for attr in ('data', 'stops', 'yields'):
+            frame = getattr(self, attr, None)
+            if frame is None:
+                continue
+            first, last = frame.index.searchsorted([t_start, t_end])
+            setattr(block, attr, frame.iloc[first:last])
+
+        return block
+
+    @cached_property
+    def part_mask(self):
+
+        """
+        Boolean array marking the cycles with a part present,
+        computed once for all of the DataBlock's stats.
+
+        """
+        return self.data['part'].to_numpy() != 0
+
+    @cached_property
+    def cycle_times(self):
+
+        """
+        Cycle times of the DataBlock as an array,
+        computed once for all of the DataBlock's stop stats.
+
+        """
+        return self.data['dt'].to_numpy()
 
     def get_data(self):
 
@@ -1,10 +1,35 @@
+from contextlib import closing
 from datetime import datetime as dt
+from hashlib import md5
+from importlib.util import find_spec
+import logging
 import os
+import sqlite3
 from warnings import filterwarnings
 
 import numpy as np
 import pandas as pd
 
+from ._kernels import NUMBA_INSTALLED, cycle_kernel
+
+# progress is logged, not printed, as days load in worker threads
+logger = logging.getLogger(__name__)
+
+# (major, minor) pandas version, some readers need a newer pandas
+PANDAS_VERSION = tuple(int(v) for v in pd.__version__.split('.')[:2])
+
+
+def _pyarrow_importable() -> bool:
+    """
+    Returns whether pyarrow imports, an installed build which fails
+    to load against the installed numpy must not be used.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except (ImportError, AttributeError):
+        return False
+    return True
+
 
 class ProcessData:
     """
@@ -12,25 +37,147 @@ class ProcessData:
     """
     ROOT_PATH = os.environ['PD_PATH']
 
+    # parquet copies of the process data files, see csv_to_parquet
+    PARQUET_SUFFIX = '.parquet'
+    PARQUET_OPTIONS = {
+        'compression': 'zstd', 'use_dictionary': True,
+        'row_group_size': 262144
+    }
+
+    # pyarrow's multi-threaded CSV reader is used for whole files if it
+    # imports, before pandas 2.0 it fails on the timestamp column
+    CSV_ENGINE = (
+        'pyarrow' if PANDAS_VERSION >= (2, 0) and _pyarrow_importable()
+        else 'c'
+    )
+
+    # optional local SQLite database caching the network files,
+    # each file is refreshed when it changes
+    CACHE_DB = os.environ.get('PD_CACHE_DB')
+
+    # files not read from the cache database for this many days
+    # are dropped from it
+    CACHE_MAX_DAYS = 90
+
     @staticmethod
     def load(
-        target_file: str, _data_headers: list
+        target_file: str, _data_headers: list,
+        usecols: list | None = None, dtype: dict | None = None,
+        source: tuple[str, int] | None = None
     ) -> pd.DataFrame | None:
         """
         Returns a Dataframe containing cleaned process data for the given file.
+        If usecols is given, only those columns are read from the file.
+        If dtype is given, columns are parsed directly to those dtypes.
+        An up-to-date parquet copy of the file is read instead if it exists.
+        If source is given, it is the (path, revision) already returned by
+        resolve_source for the file, and the file is not looked up again.
+        The local cache database is used if PD_CACHE_DB is set.
         """
         _t = dt.now()
-        print(f'{_t}: Loading data files...\t\t\t', end='')
 
+        if source is None:
+            source = ProcessData.resolve_source(target_file)
+        if source is None:
+            logger.warning(
+                'File not found: %s/%s', ProcessData.ROOT_PATH, target_file
+            )
+            return None
+
+        _path, _revision = source
+        if ProcessData.CACHE_DB is not None:
+            _raw_data = ProcessData._load_cached(
+                _path, _revision, _data_headers, usecols, dtype
+            )
+        else:
+            _raw_data = ProcessData._read_source(
+                _path, _data_headers, usecols, dtype
+            )
+
+        logger.debug('Loaded %s in %s', _path, dt.now() - _t)
+        if _raw_data is None:
+            return None
+        return ProcessData._clean_data(_raw_data)
+
+    @staticmethod
+    def slice(
+        data_: pd.DataFrame, start_datetime: dt, end_datetime: dt
+    ) -> pd.DataFrame:
+        """
+        Returns the process data from start_datetime to end_datetime,
+        both inclusive. The bounds are found by binary search on the
+        sorted DatetimeIndex and the rows are sliced by position.
+        """
+        if data_.empty:
+            return data_
+        if not data_.index.is_monotonic_increasing:
+            data_ = data_.sort_index(kind='stable')
+
+        _first = data_.index.searchsorted(start_datetime, side='left')
+        _last = data_.index.searchsorted(end_datetime, side='right')
+        return data_.iloc[_first:_last]
+
+    @staticmethod
+    def resolve_source(target_file: str) -> tuple[str, int] | None:
+        """
+        Returns the path and modification time of the file to read for the
+        given process data file, or None if neither it nor a parquet copy
+        exists. Each file is stat'ed once, callers pass the result on
+        rather than looking the file up again.
+        """
         _path = f'{ProcessData.ROOT_PATH}/{target_file}'
-        _raw_data = ProcessData._load_raw_data(
-            _path, _data_headers
+        _parquet_path = (
+            f'{os.path.splitext(_path)[0]}{ProcessData.PARQUET_SUFFIX}'
         )
+        _found: list[tuple[str, int] | None] = []
+        for _file in (_path, _parquet_path):
+            try:
+                _found.append((_file, os.stat(_file).st_mtime_ns))
+            except FileNotFoundError:
+                _found.append(None)
+        return ProcessData.pick_source(*_found)
 
-        print(f'Done in {dt.now() - _t}')
+    @staticmethod
+    def pick_source(
+        text_file: tuple[str, int] | None,
+        parquet_file: tuple[str, int] | None
+    ) -> tuple[str, int] | None:
+        """
+        Returns which of the text file and its parquet copy to read, each
+        given as (path, modification time) or None if it does not exist.
+        The parquet copy is read if it is at least as new as the text file.
+        """
+        if parquet_file is None:
+            return text_file
+        if text_file is not None and text_file[1] > parquet_file[1]:
+            # text file was appended to after the conversion
+            return text_file
+        return parquet_file
+
+    @staticmethod
+    def csv_to_parquet(
+        target_file: str, _data_headers: list, dtype: dict | None = None
+    ) -> str | None:
+        """
+        Writes a parquet copy of the given process data file next to it,
+        returns the parquet path or None if the file does not exist.
+        Requires pyarrow.
+        """
+        _path = f'{ProcessData.ROOT_PATH}/{target_file}'
+        _raw_data = ProcessData._load_raw_data(
+            _path, _data_headers, dtype=dtype
+        )
         if _raw_data is None:
             return None
-        return ProcessData._clean_data(_raw_data)
+
+        _parquet_path = (
+            f'{os.path.splitext(_path)[0]}{ProcessData.PARQUET_SUFFIX}'
+        )
+        _raw_data.to_parquet(
+            _parquet_path, engine='pyarrow', index=False,
+            **ProcessData.PARQUET_OPTIONS
+        )
+        return _parquet_path
 
     @staticmethod
     def _clean_data(data_: pd.DataFrame) -> pd.DataFrame:
@@ -39,40 +186,220 @@ class ProcessData:
         the cycles time and instantaneous rate for each cycle.
         """
         _t = dt.now()
-        print(f'{_t}: Cleaning raw data...\t\t\t', end='')
-        # clean up cognex timestamp and index by DatetimeIndex
+        # clean up cognex timestamp and index by DatetimeIndex,
+        # text files parse it while reading so this is a no-op for them
         # Could add a parsing function to better handle changes ##
-        data_['datetime'] = pd.to_datetime(data_['cognex_timestamp'])
+        if not pd.api.types.is_datetime64_dtype(data_['cognex_timestamp']):
+            data_['cognex_timestamp'] = pd.to_datetime(
+                data_['cognex_timestamp']
+            )
+
+        # moves the cognex timestamp into the DatetimeIndex
+        data_ = data_.set_index('cognex_timestamp').rename_axis('datetime')
 
-        # sets the DatetimeIndex and removes the cognex timestamp
-        data_ = data_.set_index('datetime')
-        data_ = data_.drop(['cognex_timestamp'], axis=1)
+        # sorts once here so the cycle times are never negative and
+        # blocks can use the first/last index and slice by binary search
+        if not data_.index.is_monotonic_increasing:
+            data_ = data_.sort_index(kind='stable')
 
         # converts the datetime column to timestamp values,
-        # needed to calculate cycle times
-        data_['timestamp'] = (
-            data_.index.values.astype(np.int64) / 10 ** 9
-        )
+        # needed to calculate cycle times, from the index's
+        # int64 nanoseconds without copying them first
+        data_['timestamp'] = data_.index.asi8 / 10 ** 9
 
-        # adds cycle time and frequency data to the DataFrame
-        data_['cycle_time'] = data_['timestamp'].diff()
-        data_['cycle_Hz'] = 1 / data_['cycle_time']
+        # adds cycle time and frequency data to the DataFrame,
+        # differences are taken in float64 and stored as float32
+        _timestamps = data_['timestamp'].to_numpy(dtype=np.float64)
+        _cycle_times = np.empty_like(_timestamps, dtype=np.float32)
+        _cycle_rates = np.empty_like(_timestamps, dtype=np.float32)
+        if NUMBA_INSTALLED and len(data_.index) > 0:
+            cycle_kernel()(_timestamps, _cycle_times, _cycle_rates)
+        elif len(data_.index) > 0:
+            # subtracts the shifted views straight into the output,
+            # without the intermediate Series of pandas' diff
+            _cycle_times[0] = np.nan
+            np.subtract(
+                _timestamps[1:], _timestamps[:-1], out=_cycle_times[1:]
+            )
+            with np.errstate(divide='ignore'):
+                np.divide(1, _cycle_times, out=_cycle_rates)
+        data_['cycle_time'] = _cycle_times
+        data_['cycle_Hz'] = _cycle_rates
 
-        print(f'Done in {dt.now() - _t}')
+        logger.debug(
+            'Cleaned %d rows of raw data in %s',
+            len(data_.index), dt.now() - _t
+        )
         return data_
 
+    @staticmethod
+    def _read_source(
+        _path: str, _data_headers: list,
+        usecols: list | None = None, dtype: dict | None = None
+    ) -> pd.DataFrame | None:
+        """
+        Returns the raw process data from the given text or parquet file.
+        """
+        if _path.endswith(ProcessData.PARQUET_SUFFIX):
+            return pd.read_parquet(_path, columns=usecols)
+        return ProcessData._load_raw_data(
+            _path, _data_headers, usecols, dtype
+        )
+
+    @staticmethod
+    def _load_cached(
+        _path: str, _revision: int, _data_headers: list,
+        usecols: list | None = None, dtype: dict | None = None
+    ) -> pd.DataFrame | None:
+        """
+        Returns the raw process data for the given file from the local
+        cache database, storing the whole file first if it is not cached
+        or its revision differs from the given modification time.
+        Files unused for CACHE_MAX_DAYS are evicted whenever one is stored.
+        """
+        _table = ProcessData._cached_table(_path)
+        _columns = usecols or _data_headers
+        _now = dt.now().timestamp()
+
+        with closing(
+            sqlite3.connect(ProcessData.CACHE_DB, timeout=60)
+        ) as _connection:
+            ProcessData._create_cache_index(_connection)
+            _cached = _connection.execute(
+                'SELECT revision, used_at FROM cached_files WHERE path = ?',
+                (_path,)
+            ).fetchone()
+
+            if _cached is not None and _cached[0] == _revision:
+                if _cached[1] is None or _cached[1] < _now - 86400:
+                    # last use is only recorded once a day, sparing
+                    # a write on every read
+                    _connection.execute(
+                        'UPDATE cached_files SET used_at = ? WHERE path = ?',
+                        (_now, _path)
+                    )
+                    _connection.commit()
+                _selected = ', '.join(f'"{c}"' for c in _columns)
+                _raw_data = pd.read_sql(
+                    f'SELECT {_selected} FROM "{_table}"', _connection,
+                    parse_dates={
+                        c: 'ns' for c in ['cognex_timestamp'] if c in _columns
+                    }
+                )
+                if dtype is not None:
+                    _raw_data = _raw_data.astype(
+                        {c: t for c, t in dtype.items() if c in _columns}
+                    )
+                return _raw_data
+
+            _raw_data = ProcessData._read_source(
+                _path, _data_headers, dtype=dtype
+            )
+            if _raw_data is None:
+                return None
+
+            # timestamps are stored as integer nanoseconds, as text
+            # their fractional seconds are only written when non-zero
+            _stored = _raw_data.assign(**{
+                c: _raw_data[c].to_numpy().view('int64')
+                for c in ['cognex_timestamp'] if c in _raw_data.columns
+            })
+            # a stale revision's table is replaced
+            _stored.to_sql(
+                _table, _connection, if_exists='replace', index=False
+            )
+            _connection.execute(
+                'INSERT OR REPLACE INTO cached_files VALUES (?, ?, ?)',
+                (_path, _revision, _now)
+            )
+            ProcessData._evict_cached(
+                _connection, _now - ProcessData.CACHE_MAX_DAYS * 86400
+            )
+            _connection.commit()
+
+        return _raw_data[_columns]
+
+    @staticmethod
+    def _cached_table(_path: str) -> str:
+        """
+        Returns the cache database table holding the given file,
+        one table per file named by a hash of the path.
+        """
+        return f'pd_{md5(_path.encode()).hexdigest()}'
+
+    @staticmethod
+    def _create_cache_index(_connection: sqlite3.Connection) -> None:
+        """
+        Creates the table of cached files and their revisions, adding
+        the last use column to databases created without it.
+        """
+        _connection.execute(
+            'CREATE TABLE IF NOT EXISTS cached_files '
+            '(path TEXT PRIMARY KEY, revision INTEGER, used_at REAL)'
+        )
+        _fields = [
+            _row[1] for _row in
+            _connection.execute('PRAGMA table_info(cached_files)')
+        ]
+        if 'used_at' not in _fields:
+            _connection.execute(
+                'ALTER TABLE cached_files ADD COLUMN used_at REAL'
+            )
+
+    @staticmethod
+    def _evict_cached(
+        _connection: sqlite3.Connection, _before: float
+    ) -> None:
+        """
+        Drops the cached files last used before the given timestamp,
+        along with their tables. Files cached before last use was
+        recorded are dropped too.
+        """
+        _stale = [
+            _row[0] for _row in _connection.execute(
+                'SELECT path FROM cached_files '
+                'WHERE used_at IS NULL OR used_at < ?', (_before,)
+            )
+        ]
+        for _stale_path in _stale:
+            _table = ProcessData._cached_table(_stale_path)
+            _connection.execute(f'DROP TABLE IF EXISTS "{_table}"')
+            _connection.execute(
+                'DELETE FROM cached_files WHERE path = ?', (_stale_path,)
+            )
+
     @staticmethod
     def _load_raw_data(
-        _filepath: str, _data_headers: list
+        _filepath: str, _data_headers: list,
+        usecols: list | None = None, dtype: dict | None = None
     ) -> pd.DataFrame | None:
         """
-        Returns a Dataframe containing all process data for the given file.
+        Returns a Dataframe containing the process data for the given file.
         """
+        _columns = usecols or _data_headers
+        if dtype is not None:
+            # the pyarrow engine casts every column named in dtype
+            # after reading, so columns not read must be left out
+            dtype = {c: t for c, t in dtype.items() if c in _columns}
+
+        # pandas matches usecols against the pyarrow reader's generated
+        # column names rather than names=, so subsets are read by the c engine
+        _engine = ProcessData.CSV_ENGINE
+        if not set(_data_headers) <= set(_columns):
+            _engine = 'c'
+
         try:
-            return pd.read_csv(_filepath, names=_data_headers)
+            # the parser converts the timestamps to datetime64 directly
+            return pd.read_csv(
+                _filepath, names=_data_headers, usecols=usecols, dtype=dtype,
+                engine=_engine,
+                parse_dates=[
+                    c for c in ['cognex_timestamp'] if c in _columns
+                ]
+            )
         except FileNotFoundError:
-            # if no file found, outputs warning to terminal
-            print(f'{dt.now()}: File not found: {_filepath}')
+            # if no file found, logs a warning
+            logger.warning('File not found: %s', _filepath)
             return None
 
 
@@ -82,6 +409,14 @@ class OnlineUtilizationLog:
     """
     ROOT_PATH = os.environ['OUL_PATH']
 
+    # python-calamine parses .xlsx natively and much faster than openpyxl,
+    # pandas supports it as an engine from 2.2
+    EXCEL_ENGINE = (
+        'calamine' if find_spec('python_calamine') is not None
+        and PANDAS_VERSION >= (2, 2)
+        else 'openpyxl'
+    )
+
     @staticmethod
     def load(
         machine_name: str, month: dt, sheets: list[str] = []
@@ -108,7 +443,10 @@ class OnlineUtilizationLog:
 
         file_path = f'{folder_path}/{file_name}'
 
-        with pd.ExcelFile(file_path) as excel_reader:
+        # openpyxl is opened read-only by pandas, streaming the cells
+        with pd.ExcelFile(
+            file_path, engine=OnlineUtilizationLog.EXCEL_ENGINE
+        ) as excel_reader:
             # reads the excel file into DataFrame
             filterwarnings(
                 'ignore', category=UserWarning, module='openpyxl'
@@ -0,0 +1,51 @@
+from functools import cache
+from importlib.util import find_spec
+
+import numpy as np
+
+# numba is optional, used to compute cycle times and stops in one pass
+NUMBA_INSTALLED = find_spec('numba') is not None
+
+# numexpr is optional, pandas.eval uses it for large blocks if installed
+NUMEXPR_INSTALLED = find_spec('numexpr') is not None
+
+
+@cache
+def cycle_kernel():
+    """
+    Returns the jitted kernel writing cycle times and rates for an array
+    of timestamps in one pass. numba is imported on first use.
+    """
+    from numba import njit
+
+    @njit(cache=True, error_model='numpy')
+    def _cycle_times_and_rates(timestamps, cycle_times, cycle_rates):
+        cycle_times[0] = np.nan
+        cycle_rates[0] = np.nan
+        for i in range(1, timestamps.size):
+            cycle_time = timestamps[i] - timestamps[i - 1]
+            cycle_times[i] = cycle_time
+            cycle_rates[i] = 1 / cycle_time
+
+    return _cycle_times_and_rates
+
+
+@cache
+def exceeding_kernel():
+    """
+    Returns the jitted kernel listing the positions of the values
+    above a limit in one pass. numba is imported on first use.
+    """
+    from numba import njit
+
+    @njit(cache=True)
+    def _exceeding_positions(values, limit):
+        positions = np.empty(values.size, dtype=np.int64)
+        count = 0
+        for i in range(values.size):
+            if values[i] > limit:
+                positions[count] = i
+                count += 1
+        return positions[:count]
+
+    return _exceeding_positions
@@ -1,28 +1,54 @@
 from __future__ import annotations
 
+import logging
 import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from dataclasses import dataclass, field
 from datetime import date
 from datetime import datetime as dt
+from datetime import timedelta
+from functools import cached_property
 
 import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals
 
 from application.vision import ProcessData
+from application.vision._kernels import (
+    NUMBA_INSTALLED, NUMEXPR_INSTALLED, exceeding_kernel
+)
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+
+@dataclass(slots=True)
 class ProductInspectCamera:
     """
     iTrak Poucher Product Inspect Camera object.
     """
     _machine_info: dict = field(default_factory=dict[str, str])
 
+    # set in __post_init__, declared so they get slots
+    _data_folder: str | None = field(init=False, repr=False, compare=False)
+    _process_vars: dict = field(init=False, repr=False, compare=False)
+    _process_code: str = field(init=False, repr=False, compare=False)
+    _cached_data: OrderedDict[
+        tuple[date, frozenset[str]], tuple[int | None, pd.DataFrame | None]
+    ] = field(init=False, repr=False, compare=False)
+    _cached_blocks: OrderedDict[
+        tuple[dt, dt, frozenset[str]],
+        tuple[tuple[int | None, ...], ProductInspectData]
+    ] = field(init=False, repr=False, compare=False)
+
     def __post_init__(self: ProductInspectCamera) -> None:
         self._data_folder = self.machine_info.get('data_folder', None)
         self._process_vars = self.PROCESS_VARS
         self._process_code = self.process_vars['PROCESS_CODE']
+        self._cached_data = OrderedDict()
+        self._cached_blocks = OrderedDict()
 
     # region process_info
 
@@ -31,6 +57,22 @@ class ProductInspectCamera:
         "part_present", "cognex_timestamp"
     ]
 
+    # low-cardinality text columns are stored as categoricals,
+    # part_present is a 0/1 flag
+    RAW_DATA_DTYPES = {
+        "item_number": "category", "lot_number": "category",
+        "part_present": "int8"
+    }
+
+    # columns used by ProductInspectData, loaded by default
+    DATA_COLUMNS = [
+        "serial_number", "part_present", "cognex_timestamp"
+    ]
+
+    # columns every block needs for its cycle and part stats,
+    # read even if they are not requested
+    REQUIRED_COLUMNS = ["part_present", "cognex_timestamp"]
+
     PROCESS_VARS = {
 
         'PROCESS_CODE': 'PR',
@@ -48,6 +90,19 @@ class ProductInspectCamera:
         'SHORT_STOP_BIN_WIDTH_SECONDS': 2,
         'LONG_STOP_BIN_WIDTH_SECONDS': 60
     }
+
+    # maximum number of data files read concurrently
+    MAX_LOAD_WORKERS = 8
+
+    # maximum number of (day, columns) entries held in the data cache
+    CACHE_MAX_DAYS = 90
+
+    # maximum number of DataBlocks held for reuse by new_block
+    CACHE_MAX_BLOCKS = 32
+
+    # spans of at least this many days list the data folder once
+    # instead of looking up each day's file
+    SCANDIR_MIN_DAYS = 7
     # endregion
     ...
 
@@ -71,93 +126,343 @@ class ProductInspectCamera:
         return self._process_vars
 
     @property
-    def cached_data(self: ProductInspectCamera) -> dict:
+    def cached_data(self: ProductInspectCamera) -> OrderedDict:
         return self._cached_data
     # endregion
     ...
 
     # region methods
+    def _columns_key(
+        self: ProductInspectCamera, columns: list[str] | None
+    ) -> frozenset[str]:
+        """
+        Returns the set of raw columns to read for the given columns,
+        defaulting to DATA_COLUMNS. REQUIRED_COLUMNS are always read.
+        """
+        return (
+            frozenset(columns or self.DATA_COLUMNS)
+            | frozenset(self.REQUIRED_COLUMNS)
+        )
+
+    def _cached_key(
+        self: ProductInspectCamera, day_: date, columns_: frozenset[str],
+        revision_: int | None
+    ) -> tuple[date, frozenset[str]] | None:
+        """
+        Returns the cache key holding the given columns for the day,
+        including entries loaded with a superset of the columns.
+        Entries loaded from another revision of the file are evicted.
+        """
+        found_ = None
+        for key_ in [k for k in self._cached_data if k[0] == day_]:
+            if self._cached_data[key_][0] != revision_:
+                del self._cached_data[key_]
+            elif columns_ <= key_[1] and (
+                found_ is None or key_[1] == columns_
+            ):
+                found_ = key_
+        return found_
+
     def _to_cache(
         self: ProductInspectCamera,
-        key_: date, data_: pd.DataFrame | None
+        key_: tuple[date, frozenset[str]],
+        revision_: int | None, data_: pd.DataFrame | None
     ) -> None:
         """
-        Stores the given datetime key and process data in a
-        cached DataFrame for further use.
+        Stores the given (date, columns) key, file revision and process
+        data in a cached DataFrame for further use. The least recently
+        used days are evicted beyond CACHE_MAX_DAYS.
         """
-        self._cached_data.update({key_: data_})
+        self._cached_data[key_] = (revision_, data_)
+        self._cached_data.move_to_end(key_)
+        while len(self._cached_data) > self.CACHE_MAX_DAYS:
+            self._cached_data.popitem(last=False)
+
+    def _from_cache(
+        self: ProductInspectCamera,
+        key_: tuple[date, frozenset[str]], columns_: frozenset[str]
+    ) -> pd.DataFrame | None:
+        """
+        Returns the given columns of the cached data for the key
+        and marks it as recently used. Raises KeyError if not cached.
+        """
+        data_ = self._cached_data[key_][1]
+        self._cached_data.move_to_end(key_)
+
+        if data_ is None or key_[1] == columns_:
+            return data_
+        return data_.drop(columns=list(key_[1] - columns_))
 
     def new_block(
-        self: ProductInspectCamera, start_datetime: dt, end_datetime: dt
+        self: ProductInspectCamera, start_datetime: dt, end_datetime: dt,
+        columns: list[str] | None = None
     ) -> ProductInspectData:
         """
         Returns a DataBlock object of process data for the given timespan.
+        Only the given raw columns and REQUIRED_COLUMNS are loaded,
+        rework stats also need serial_number. Blocks are reused, along
+        with their computed stats, until one of their data files changes.
         """
-        _t = dt.now()
-
-        print(
-            f'\n\nCreating DataBlock for {self.__str__()}: '
-            f'{start_datetime} - {end_datetime}\n'
+        sources_ = self._day_sources(
+            self._parse_dates(start_datetime, end_datetime)
         )
-
-        data_ = self._concatenate_days(
-            pd.date_range(start_datetime, end_datetime, freq='d')
+        key_ = (start_datetime, end_datetime, self._columns_key(columns))
+        revisions_ = tuple(
+            None if s is None else s[1] for s in sources_.values()
         )
 
-        print(
-            f'Retrieved data with length '
-            f'{len(data_.index)} in {dt.now() - _t}'
+        cached_ = self._cached_blocks.get(key_)
+        if cached_ is not None and cached_[0] == revisions_:
+            self._cached_blocks.move_to_end(key_)
+            return cached_[1]
+
+        debug_ = logger.isEnabledFor(logging.DEBUG)
+        if debug_:
+            _t = dt.now()
+            logger.debug(
+                'Creating DataBlock for %s: %s - %s',
+                self, start_datetime, end_datetime
+            )
+
+        data_ = self._concatenate_days(sources_, columns)
+
+        # keeps only the cycles within the block's timespan
+        data_ = ProcessData.slice(data_, start_datetime, end_datetime)
+
+        if debug_:
+            logger.debug(
+                'Retrieved data with length %d in %s',
+                len(data_.index), dt.now() - _t
+            )
+
+        block_ = ProductInspectData(
+            self, data_, start_datetime, end_datetime
         )
+        self._cached_blocks[key_] = (revisions_, block_)
+        self._cached_blocks.move_to_end(key_)
+        while len(self._cached_blocks) > self.CACHE_MAX_BLOCKS:
+            self._cached_blocks.popitem(last=False)
+        return block_
+
+    @staticmethod
+    def _parse_dates(start_datetime: dt, end_datetime: dt) -> list[date]:
+        """
+        Returns each calendar day from the start to the end datetime.
+        """
+        first_day = start_datetime.date()
+        day_count = (end_datetime.date() - first_day).days + 1
+        return [first_day + timedelta(days=i) for i in range(day_count)]
+
+    def _day_sources(
+        self: ProductInspectCamera, days_: list[date]
+    ) -> dict[date, tuple[str, int] | None]:
+        """
+        Returns the (path, revision) of the process data file to read for
+        each of the given days, None for days without a file. Each day is
+        resolved once here and passed on to the loads.
+        Long spans are resolved from a single listing of the data folder.
+        """
+        if len(days_) < self.SCANDIR_MIN_DAYS:
+            return {
+                d: ProcessData.resolve_source(self._target_file(d))
+                for d in days_
+            }
+
+        pattern_ = re.compile(
+            rf'{re.escape(self.process_code)}(\d{{8}})'
+            rf'(\.txt|{re.escape(ProcessData.PARQUET_SUFFIX)})'
+        )
+        wanted_ = {f'{d:%Y%m%d}': d for d in days_}
+        found_: dict[tuple[date, str], tuple[str, int]] = {}
+        try:
+            with os.scandir(
+                f'{ProcessData.ROOT_PATH}/{self.data_folder}'
+            ) as entries_:
+                for entry_ in entries_:
+                    match_ = pattern_.fullmatch(entry_.name)
+                    if match_ is None or match_.group(1) not in wanted_:
+                        continue
+                    # the listing already holds the stat on Windows shares
+                    found_[(wanted_[match_.group(1)], match_.group(2))] = (
+                        f'{ProcessData.ROOT_PATH}/{self.data_folder}/'
+                        f'{entry_.name}',
+                        entry_.stat().st_mtime_ns
+                    )
+        except FileNotFoundError:
+            pass
 
-        return ProductInspectData(self, data_, start_datetime, end_datetime)
+        return {
+            d: ProcessData.pick_source(
+                found_.get((d, '.txt')),
+                found_.get((d, ProcessData.PARQUET_SUFFIX))
+            ) for d in days_
+        }
 
     def _concatenate_days(
-        self: ProductInspectCamera, days: pd.DatetimeIndex
+        self: ProductInspectCamera,
+        sources: dict[date, tuple[str, int] | None],
+        columns: list[str] | None = None
     ) -> pd.DataFrame:
         """
-        Fetch the data for each item in dates.
+        Fetch the data for each day from its resolved source.
         """
-        data_ = pd.DataFrame()
-        for day_ in days.to_pydatetime():
-            new_data = self.load_data(day_)
-            if new_data is None:
-                continue
-            data_ = pd.concat([data_, new_data])
+        columns_ = self._columns_key(columns)
 
-        return data_
+        # hold references so long spans survive cache eviction
+        day_data: dict[date, pd.DataFrame | None] = {}
+        for day_, source_ in sources.items():
+            cached_key = self._cached_key(
+                day_, columns_, None if source_ is None else source_[1]
+            )
+            if cached_key is not None:
+                day_data[day_] = self._from_cache(cached_key, columns_)
+        day_data.update(self._load_days(
+            {d: s for d, s in sources.items() if d not in day_data},
+            columns_
+        ))
+
+        frames_ = [day_data[d] for d in sources if day_data[d] is not None]
+        if not frames_:
+            return pd.DataFrame()
+
+        return self._combine_frames(frames_)
+
+    @staticmethod
+    def _combine_frames(frames_: list[pd.DataFrame]) -> pd.DataFrame:
+        """
+        Returns the given days' data as one DataFrame, independent of the
+        cached frames. Each column is copied once into an array of the
+        exact total length, categoricals are combined without
+        converting to object dtype.
+        """
+        total_ = sum(len(f.index) for f in frames_)
+
+        index_ = np.empty(total_, dtype=np.int64)
+        np.concatenate([f.index.asi8 for f in frames_], out=index_)
+
+        columns_: dict[str, np.ndarray | pd.api.extensions.ExtensionArray] = {}
+        for column_ in frames_[0].columns:
+            parts_ = [f[column_] for f in frames_]
+            dtypes_ = {p.dtype for p in parts_}
+            if all(
+                isinstance(d, pd.CategoricalDtype) for d in dtypes_
+            ) and len({d.categories.dtype for d in dtypes_}) == 1:
+                columns_[column_] = union_categoricals(parts_)
+            elif len(dtypes_) == 1 and isinstance(
+                next(iter(dtypes_)), np.dtype
+            ):
+                columns_[column_] = np.empty(total_, dtype=dtypes_.pop())
+                np.concatenate(
+                    [p.to_numpy() for p in parts_], out=columns_[column_]
+                )
+            else:
+                # extension dtypes, as parquet copies can hold, or days
+                # parsed to different dtypes: let pandas combine them
+                columns_[column_] = pd.concat(
+                    parts_, ignore_index=True
+                ).array
+
+        return pd.DataFrame(
+            columns_,
+            index=pd.DatetimeIndex(index_, name=frames_[0].index.name)
+        )
+
+    def _load_days(
+        self: ProductInspectCamera,
+        sources_: dict[date, tuple[str, int] | None],
+        columns_: frozenset[str]
+    ) -> dict[date, pd.DataFrame | None]:
+        """
+        Loads the process data files for the given days concurrently,
+        stores the results in the cache and returns them.
+        """
+        loaded_: dict[date, pd.DataFrame | None] = {}
+        if not sources_:
+            return loaded_
+
+        keys_ = list(sources_)
+        workers_ = min(self.MAX_LOAD_WORKERS, len(keys_))
+        with ThreadPoolExecutor(max_workers=workers_) as executor_:
+            # workers only read and parse, the cache is written here
+            for key_, (revision_, data_) in zip(keys_, executor_.map(
+                self._load_day, keys_, [columns_] * len(keys_),
+                sources_.values()
+            )):
+                self._to_cache((key_, columns_), revision_, data_)
+                loaded_[key_] = data_
+
+        return loaded_
 
     def load_data(
-        self: ProductInspectCamera, date_: dt
+        self: ProductInspectCamera, date_: dt,
+        columns: list[str] | None = None
     ) -> pd.DataFrame | None:
         """
         Returns cached data if it exists, otherwise loads
         the data from process data files.
         """
         key_ = date(date_.year, date_.month, date_.day)
+        columns_ = self._columns_key(columns)
+        source_ = ProcessData.resolve_source(self._target_file(key_))
 
-        try:
-            return self.cached_data[key_]
+        cached_key = self._cached_key(
+            key_, columns_, None if source_ is None else source_[1]
+        )
+        if cached_key is not None:
+            return self._from_cache(cached_key, columns_)
 
-        except AttributeError:
-            self._cached_data = {}
-            self._to_cache(key_, self._load_data_from_file(date_))
-            return self.cached_data[key_]
+        revision_, data_ = self._load_day(key_, columns_, source_)
+        self._to_cache((key_, columns_), revision_, data_)
+        return data_
 
-        except KeyError:
-            self._to_cache(key_, self._load_data_from_file(date_))
-            return self.cached_data[key_]
+    def _load_day(
+        self: ProductInspectCamera, day_: date, columns_: frozenset[str],
+        source_: tuple[str, int] | None
+    ) -> tuple[int | None, pd.DataFrame | None]:
+        """
+        Returns the file revision and process data for the given day,
+        read from its resolved source. The revision was read before the
+        file, so any later change forces a reload.
+        """
+        if source_ is None:
+            return None, None
+        return source_[1], self._load_data_from_file(
+            day_, columns_, source_
+        )
+
+    def _target_file(self: ProductInspectCamera, date_: date) -> str:
+        """
+        Returns the process data file path for the given day.
+        """
+        return f'{self.data_folder}/{self.process_code}{date_:%Y%m%d}.txt'
 
     def _load_data_from_file(
-        self: ProductInspectCamera, date_: dt
+        self: ProductInspectCamera, date_: date,
+        columns_: frozenset[str] | None = None,
+        source_: tuple[str, int] | None = None
     ) -> pd.DataFrame | None:
         """
-        Loads process data file for the given day.
+        Loads process data file for the given day, from source_ if
+        it has already been resolved.
         """
-        target_file = (
-            f'{self.data_folder}/{self.process_code}{date_:%Y%m%d}.txt'
+        if columns_ is None:
+            columns_ = self._columns_key(None)
+
+        return ProcessData.load(
+            self._target_file(date_), self.RAW_DATA_HEADERS,
+            usecols=[h for h in self.RAW_DATA_HEADERS if h in columns_],
+            dtype=self.RAW_DATA_DTYPES, source=source_
         )
 
-        return ProcessData.load(target_file, self.RAW_DATA_HEADERS)
+    def to_parquet(self: ProductInspectCamera, date_: date) -> str | None:
+        """
+        Converts the process data file for the given day to parquet,
+        which is read instead of the text file from then on.
+        """
+        return ProcessData.csv_to_parquet(
+            self._target_file(date_), self.RAW_DATA_HEADERS,
+            dtype=self.RAW_DATA_DTYPES
+        )
 
     def __str__(self: ProductInspectCamera) -> str:
         return (f'{self.data_folder}-{self.process_code}')
@@ -165,11 +470,55 @@ class ProductInspectCamera:
     ...
 
 
+@dataclass(slots=True, frozen=True)
+class BlockColumns:
+    """
+    The process data columns used by the stats, as plain arrays.
+    Columns which were not loaded are None.
+    """
+    timestamp_ns: np.ndarray
+    cycle_time: np.ndarray
+    part_present: np.ndarray | None
+    serial_number: np.ndarray | None
+
+    @classmethod
+    def from_frame(
+        cls: type[BlockColumns], data_: pd.DataFrame
+    ) -> BlockColumns:
+        """
+        Returns the columns of the given process data.
+        """
+        def column_(name_: str) -> np.ndarray | None:
+            if name_ not in data_.columns:
+                return None
+            return data_[name_].to_numpy()
+
+        return cls(
+            timestamp_ns=data_.index.asi8,
+            cycle_time=np.ascontiguousarray(data_['cycle_time'].to_numpy()),
+            part_present=column_('part_present'),
+            serial_number=column_('serial_number')
+        )
+
+    def required(self: BlockColumns, name_: str) -> np.ndarray:
+        """
+        Returns the named column, raises ValueError if it was not loaded.
+        """
+        column_ = getattr(self, name_)
+        if column_ is None:
+            raise ValueError(f'Column {name_} was not loaded for the block.')
+        return column_
+
+
 @dataclass
 class ProductInspectData:
     """
     Object for handling data logged by the
     iTrak Poucher Product Inspect Camera.
+
+    The data must be sorted by its DatetimeIndex, as returned by
+    ProcessData.load and ProcessData.slice, so the first and last
+    cycles are read from the ends of the index rather than searched for.
     """
     _data_source: ProductInspectCamera
     _data: pd.DataFrame
@@ -188,62 +537,13 @@ class ProductInspectData:
             f'{self._end_datetime:%Y%m%d-%H%M%S}'
         )
 
-    # region dicts
+    # region vars
     def _init_vars(self: ProductInspectData) -> None:
         """
-        Initializes variables, properties,
-        and dictionaries used within this class.
+        Initializes variables and properties used within this class.
         """
         self._process_vars = deepcopy(self.data_source.process_vars)
         self._process_code = self.process_vars['PROCESS_CODE']
-
-        self._cycle_stats_dict = {
-
-            'first_cycle': self.first_cycle,
-            'last_cycle': self.last_cycle,
-
-            'all_cycle_time': self.all_cycle_time,
-            'cycle_count': self.cycle_count,
-        }
-
-        self._parts_stats_dict = {
-
-            'part_count': self.part_count,
-            'first_part': self.first_part,
-            'last_part': self.last_part,
-            'productive_time': self.productive_time,
-
-            'empty_count': self.empty_count,
-            'empty_rate': self.empty_rate,
-
-            'rework_count': self.rework_count,
-            'rework_rate': self.rework_rate
-        }
-
-        self._stops_stats_dict = {
-
-            'total_stop_count': self.total_stop_count,
-            'total_stop_time': self.total_stop_time,
-            'total_run_time': self.total_run_time,
-            'uptime_percentage': self.uptime_percentage,
-
-            'short_stop_count': self.short_stop_count,
-            'short_stop_time': self.short_stop_time,
-
-            'long_stop_count': self.long_stop_count,
-            'long_stop_time': self.long_stop_time,
-        }
-
-        self._oee_stats_dict = {
-
-            'oee_run_time': self.oee_run_time,
-
-            'availability_rate': self.availability_rate,
-            'performance_rate': self.performance_rate,
-            'quality_rate': self.quality_rate,
-
-            'oee_rate': self.oee_rate
-        }
     # endregion
     ...
 
@@ -264,480 +564,567 @@ class ProductInspectData:
     def process_vars(self: ProductInspectData) -> dict:
         return self._process_vars
 
-    @property
-    def all_stats(self: ProductInspectData) -> dict:
-        try:
-            return self._all_stats
-        except AttributeError:
-            self._run_all_stats()
-            return self._all_stats
-
-    @property
-    def cycle_stats(self: ProductInspectData) -> dict:
-        try:
-            return self._cycle_stats
-        except AttributeError:
-            self._run_cycle_stats()
-            return self._cycle_stats
-
-    @property
-    def parts_stats(self: ProductInspectData) -> dict:
-        try:
-            return self._parts_stats
-        except AttributeError:
-            self._run_parts_stats()
-            return self._parts_stats
-
-    @property
-    def stops_stats(self: ProductInspectData) -> dict:
-        try:
-            return self._stops_stats
-        except AttributeError:
-            self._run_stops_stats()
-            return self._stops_stats
-
-    @property
-    def oee_stats(self: ProductInspectData) -> dict:
-        try:
-            return self._oee_stats
-        except AttributeError:
-            self._run_oee_stats()
-        return self._oee_stats
+    @cached_property
+    def columns(self: ProductInspectData) -> BlockColumns:
+        return BlockColumns.from_frame(self.data)
     # endregion
     ...
 
     # region stats
-    def _run_all_stats(self: ProductInspectData) -> None:
+    @cached_property
+    def all_stats(self: ProductInspectData) -> dict:
         """
-        Calls the corresponding method for each group of stats.
+        Combines each group of stats for the datablock.
         """
         _t = dt.now()
         print(f'{_t}: Running all stats...\t\t\t', end='')
 
-        self._all_stats = (
+        all_stats_ = (
             self.cycle_stats
             | self.parts_stats
             | self.stops_stats
             | self.oee_stats
         )
         print(f'Done in {dt.now() - _t}')
+        return all_stats_
 
-    def _run_cycle_stats(self: ProductInspectData) -> None:
+    @cached_property
+    def cycle_stats(self: ProductInspectData) -> dict:
         """
-        Calculates statistics related to all machine cycles for the datablock.
+        Statistics related to all machine cycles for the datablock.
         """
-        self._cycle_stats = {}
-        for key_, method_ in self._cycle_stats_dict.items():
-            self._cycle_stats[key_] = method_
+        return {
+
+            'first_cycle': self.first_cycle,
+            'last_cycle': self.last_cycle,
 
-    def _run_parts_stats(self: ProductInspectData) -> None:
+            'all_cycle_time': self.all_cycle_time,
+            'cycle_count': self.cycle_count,
+        }
+
+    @cached_property
+    def parts_stats(self: ProductInspectData) -> dict:
         """
-        Calculates statistics related to parts made for the datablock.
+        Statistics related to parts made for the datablock.
         """
-        self._parts_stats = {}
-        for key_, method_ in self._parts_stats_dict.items():
-            self._parts_stats[key_] = method_
+        return {
+
+            'part_count': self.part_count,
+            'first_part': self.first_part,
+            'last_part': self.last_part,
+            'productive_time': self.productive_time,
+
+            'empty_count': self.empty_count,
+            'empty_rate': self.empty_rate,
+
+            'rework_count': self.rework_count,
+            'rework_rate': self.rework_rate
+        }
 
-    def _run_stops_stats(self: ProductInspectData) -> None:
+    @cached_property
+    def stops_stats(self: ProductInspectData) -> dict:
         """
-        Calculates statistics related to machine stops for the datablock.
+        Statistics related to machine stops for the datablock.
         """
-        self._stops_stats = {}
-        for key_, method_ in self._stops_stats_dict.items():
-            self._stops_stats[key_] = method_
+        return {
 
-    def _run_oee_stats(self: ProductInspectData) -> None:
+            'total_stop_count': self.total_stop_count,
+            'total_stop_time': self.total_stop_time,
+            'total_run_time': self.total_run_time,
+            'uptime_percentage': self.uptime_percentage,
+
+            'short_stop_count': self.short_stop_count,
+            'short_stop_time': self.short_stop_time,
+
+            'long_stop_count': self.long_stop_count,
+            'long_stop_time': self.long_stop_time,
+        }
+
+    @cached_property
+    def oee_stats(self: ProductInspectData) -> dict:
         """
-        Calculates statistics related to OEE for the data.
+        Statistics related to OEE for the datablock.
         """
-        self._oee_stats = {}
-        for key_, method_ in self._oee_stats_dict.items():
-            self._oee_stats[key_] = method_
+        return {
+
+            'oee_run_time': self.oee_run_time,
+
+            'availability_rate': self.availability_rate,
+            'performance_rate': self.performance_rate,
+            'quality_rate': self.quality_rate,
+
+            'oee_rate': self.oee_rate
+        }
 
     # region cycle_stats
-    @property
+    @cached_property
     def first_cycle(self: ProductInspectData) -> pd.Timestamp:
         """
-        Returns time of first cycle for the given data.
+        Returns time of first cycle for the given data,
+        the start of the sorted index.
         """
-        try:
-            return self._first_cycle
-        except AttributeError:
-            self._first_cycle = pd.Timestamp(min(self.data.index.values))
-            return self._first_cycle
+        return self.data.index[0]
 
-    @property
+    @cached_property
     def last_cycle(self: ProductInspectData) -> pd.Timestamp:
         """
-        Returns time of last cycle for the given data.
+        Returns time of last cycle for the given data,
+        the end of the sorted index.
         """
-        try:
-            return self._last_cycle
-        except AttributeError:
-            self._last_cycle = pd.Timestamp(max(self.data.index.values))
-            return self._last_cycle
+        return self.data.index[-1]
 
-    @property
+    @cached_property
     def all_cycle_time(self: ProductInspectData) -> float:
         """
         Returns the time difference (in seconds)
         between the first and last cycle.
         """
-        try:
-            return self._all_cycle_time
-        except AttributeError:
-            self._all_cycle_time = (
-                self.last_cycle
-                - self.first_cycle
-            ).total_seconds()
-            pass
-            return self._all_cycle_time
+        index_ns = self.columns.timestamp_ns
+        return (index_ns[-1] - index_ns[0]) / 10 ** 9
 
-    @property
+    @cached_property
     def cycle_count(self: ProductInspectData) -> int:
         """
         Returns a cycle count for the given data.
         """
-        try:
-            return self._cycle_count
-        except AttributeError:
-            self._cycle_count = len(self.data.index)
-            return self._cycle_count
+        return len(self.data.index)
     # endregion
     ...
 
     # region parts_stats
-    @property
+    @cached_property
+    def part_mask(self: ProductInspectData) -> np.ndarray:
+        """
+        Returns a boolean array marking the cycles with a part present.
+        """
+        return self.columns.required('part_present') == 1
+
+    @cached_property
+    def part_positions(self: ProductInspectData) -> np.ndarray:
+        """
+        Returns the integer positions of the non-empty cycles.
+        """
+        return np.flatnonzero(self.part_mask)
+
+    @cached_property
+    def empty_positions(self: ProductInspectData) -> np.ndarray:
+        """
+        Returns the integer positions of the empty cycles.
+        """
+        return np.flatnonzero(~self.part_mask)
+
+    @cached_property
     def parts(self: ProductInspectData) -> pd.DataFrame:
         """
         Returns non-empty poucher cycles for the data.
         """
-        try:
-            return self._parts
-        except AttributeError:
-            self._parts = self.data.query('part_present == 1')
-            return self._parts
+        return self.data.take(self.part_positions)
 
-    @property
+    @cached_property
+    def _part_bounds(self: ProductInspectData) -> tuple[int, int]:
+        """
+        Returns the positions of the first and last non-empty cycles.
+        """
+        mask_ = self.part_mask
+        if not mask_.any():
+            raise ValueError('No parts found in DataBlock.')
+        return (
+            int(np.argmax(mask_)),
+            mask_.size - 1 - int(np.argmax(mask_[::-1]))
+        )
+
+    @cached_property
     def first_part(self: ProductInspectData) -> pd.Timestamp:
         """
         Returns the DatetimeIndex of the first part made.
         """
-        try:
-            return self._first_part
-        except AttributeError:
-            self._first_part = pd.Timestamp(
-                min(self.parts.index.values)
-            )
-            return self._first_part
+        return self.data.index[self._part_bounds[0]]
 
-    @property
+    @cached_property
     def last_part(self: ProductInspectData) -> pd.Timestamp:
         """
         Returns the DatetimeIndex of the last part made.
         """
-        try:
-            return self._last_part
-        except AttributeError:
-            self._last_part = pd.Timestamp(
-                max(self.parts.index.values)
-            )
-            return self._last_part
+        return self.data.index[self._part_bounds[1]]
 
-    @property
+    @cached_property
     def productive_time(self: ProductInspectData) -> float:
         """
         Returns the time duration (in seconds)
         between the first part and last part.
         """
-        try:
-            return self._productive_time
-        except AttributeError:
-            self._productive_time = (
-                self.last_part - self.first_part
-            ).total_seconds()
-            return self._productive_time
+        first_, last_ = self._part_bounds
+        index_ns = self.columns.timestamp_ns
+        return (index_ns[last_] - index_ns[first_]) / 10 ** 9
 
-    @property
+    @cached_property
     def part_count(self: ProductInspectData) -> int:
         """
         Returns the number of non-empty cycles for the data.
         """
-        try:
-            return self._part_count
-        except AttributeError:
-            self._part_count = len(self.parts.index)
-            return self._part_count
+        return np.count_nonzero(self.part_mask)
 
-    @property
+    @cached_property
     def empty_cycles(self: ProductInspectData) -> pd.DataFrame:
         """
         Returns all cycles with no part present.
         """
-        try:
-            return self._empty_cycles
-        except AttributeError:
-            self._empty_cycles = self.data.query('part_present == 0')
-            return self._empty_cycles
+        return self.data.take(self.empty_positions)
 
-    @property
+    @cached_property
     def empty_count(self: ProductInspectData) -> int:
         """
         Returns the number of empty cycles for the data.
         """
-        try:
-            return self._empty_count
-        except AttributeError:
-            self._empty_count = len(self.empty_cycles.index)
-            return self._empty_count
+        return self.part_mask.size - self.part_count
 
-    @property
+    @cached_property
     def empty_rate(self: ProductInspectData) -> float:
         """
         Returns the decimal percentage of empty cycles for the data.
         """
-        try:
-            return self._empty_rate
-        except AttributeError:
-            self._empty_rate = self.empty_count / self.cycle_count
-            return self._empty_rate
+        return self.empty_count / self.cycle_count
 
-    @property
+    @cached_property
+    def rework_mask(self: ProductInspectData) -> np.ndarray:
+        """
+        Returns a boolean array marking cycles with duplicate serial numbers.
+        """
+        return (
+            pd.Series(
+                self.columns.required('serial_number')
+            ).duplicated().to_numpy()
+        )
+
+    @cached_property
     def reworks(self: ProductInspectData) -> pd.DataFrame:
         """
         Returns all cycles with duplicate serial numbers.
         """
-        try:
-            return self._reworks
-        except AttributeError:
-            self._reworks = self.data[
-                self.data.duplicated('serial_number')
-            ]
-            return self._reworks
+        return self.data.take(np.flatnonzero(self.rework_mask))
 
-    @property
+    # largest range of integer serial numbers, per cycle,
+    # counted with a bitset rather than a hash table
+    BITSET_MAX_SPAN = 8
+
+    @cached_property
     def rework_count(self: ProductInspectData) -> int:
         """
         Returns the number of parts with duplicate serial numbers.
         """
-        try:
-            return self._rework_count
-        except AttributeError:
-            self._rework_count = len(self.reworks.index)
-            return self._rework_count
-
-    @property
+        serial_numbers = self.columns.required('serial_number')
+        if serial_numbers.dtype.kind in 'iu' and serial_numbers.size:
+            # integer serials over a compact range are marked in a bitset,
+            # avoiding the hash table
+            low_ = serial_numbers.min()
+            span_ = int(serial_numbers.max()) - int(low_) + 1
+            if span_ <= self.BITSET_MAX_SPAN * serial_numbers.size:
+                seen_ = np.zeros(span_, dtype=bool)
+                seen_[serial_numbers - low_] = True
+                return serial_numbers.size - int(np.count_nonzero(seen_))
+        return serial_numbers.size - pd.unique(serial_numbers).size
+
+    @cached_property
     def rework_rate(self: ProductInspectData) -> float:
         """
         Returns the decimal percentage of reworked parts.
         """
-        try:
-            return self._rework_rate
-        except AttributeError:
-            self._rework_rate = self.rework_count / self.cycle_count
-            return self._rework_rate
+        return self.rework_count / self.cycle_count
     # endregion
     ...
 
     # region stop_stats
-    @property
+    @cached_property
+    def cycle_times(self: ProductInspectData) -> np.ndarray:
+        """
+        Returns the cycle times for the data as a contiguous array.
+        """
+        return self.columns.cycle_time
+
+    # blocks with at least this many cycles evaluate their masks
+    # with numexpr, below it the thread start-up costs more than it saves
+    NUMEXPR_MIN_CYCLES = 50_000
+
+    @cached_property
+    def _use_numexpr(self: ProductInspectData) -> bool:
+        """
+        Returns whether the masks are evaluated by numexpr,
+        only for large blocks and if it is installed.
+        """
+        return (
+            NUMEXPR_INSTALLED
+            and self.cycle_count >= self.NUMEXPR_MIN_CYCLES
+        )
+
+    @staticmethod
+    def _evaluate(expression_: str, **operands_) -> np.ndarray:
+        """
+        Returns the boolean array for the given expression of the operands,
+        evaluated by numexpr. Smaller blocks compare with numpy directly,
+        pd.eval's parsing would cost more than the comparison.
+        """
+        return pd.eval(expression_, engine='numexpr', local_dict=operands_)
+
+    @cached_property
+    def stop_mask(self: ProductInspectData) -> np.ndarray:
+        """
+        Returns a boolean array marking cycles which exceed
+        maximum cycle time.
+        """
+        limit_ = self.process_vars['MAX_CYCLE_TIME_SECONDS']
+        if self._use_numexpr:
+            return self._evaluate(
+                'ct > limit', ct=self.cycle_times, limit=limit_
+            )
+        return self.cycle_times > limit_
+
+    def _exceeding_positions(
+        self: ProductInspectData, limit_: float
+    ) -> np.ndarray:
+        """
+        Returns the positions of the cycles longer than limit_ seconds,
+        scanned by the numba kernel. The limit is cast to the cycle time
+        dtype, as numpy casts it when comparing.
+        """
+        cycle_times_ = self.cycle_times
+        return exceeding_kernel()(
+            cycle_times_, cycle_times_.dtype.type(limit_)
+        )
+
+    @cached_property
+    def stop_positions(self: ProductInspectData) -> np.ndarray:
+        """
+        Returns the integer positions of the cycles which exceed
+        maximum cycle time.
+        """
+        if NUMBA_INSTALLED:
+            return self._exceeding_positions(
+                self.process_vars['MAX_CYCLE_TIME_SECONDS']
+            )
+        return np.flatnonzero(self.stop_mask)
+
+    @cached_property
+    def long_stop_positions(self: ProductInspectData) -> np.ndarray:
+        """
+        Returns the integer positions of the stops with duration
+        longer than SHORT_STOP_LIMIT.
+        """
+        if NUMBA_INSTALLED:
+            return self._exceeding_positions(
+                self.process_vars['SHORT_STOP_LIMIT_SECONDS']
+            )
+        return np.flatnonzero(self.long_stop_mask)
+
+    @cached_property
+    def run_mask(self: ProductInspectData) -> np.ndarray:
+        """
+        Returns a boolean array marking cycles which do not exceed
+        maximum cycle time.
+        """
+        limit_ = self.process_vars['MAX_CYCLE_TIME_SECONDS']
+        if self._use_numexpr:
+            return self._evaluate(
+                'ct < limit', ct=self.cycle_times, limit=limit_
+            )
+        return self.cycle_times < limit_
+
+    @cached_property
+    def short_stop_mask(self: ProductInspectData) -> np.ndarray:
+        """
+        Returns a boolean array marking stops with duration
+        up to SHORT_STOP_LIMIT. A cycle of exactly the maximum cycle time
+        is neither a run cycle nor a stop, but counts as a short stop.
+        """
+        limit_ = self.process_vars['MAX_CYCLE_TIME_SECONDS']
+        if self._use_numexpr:
+            return self._evaluate(
+                '(ct >= limit) & ~long', ct=self.cycle_times, limit=limit_,
+                long=self.long_stop_mask
+            )
+        return (self.cycle_times >= limit_) & ~self.long_stop_mask
+
+    @cached_property
+    def long_stop_mask(self: ProductInspectData) -> np.ndarray:
+        """
+        Returns a boolean array marking stops with duration
+        longer than SHORT_STOP_LIMIT.
+        """
+        limit_ = self.process_vars['SHORT_STOP_LIMIT_SECONDS']
+        if self._use_numexpr:
+            return self._evaluate(
+                'ct > limit', ct=self.cycle_times, limit=limit_
+            )
+        return self.cycle_times > limit_
+
+    # cycle categories used to total cycle counts and times,
+    # AT_MAX_CYCLE cycles only count as short stops
+    RUN_CYCLE, SHORT_STOP, LONG_STOP, UNCOUNTED, AT_MAX_CYCLE = range(5)
+
+    @cached_property
+    def _cycle_totals(self: ProductInspectData) -> tuple[np.ndarray, ...]:
+        """
+        Returns the cycle count and total cycle time for each cycle
+        category, from a single pass over the cycle times.
+        """
+        categories_ = (
+            self.stop_mask.view(np.int8) + self.long_stop_mask.view(np.int8)
+        )
+        # neither run nor stop: the first cycle and cycles exactly at max
+        neither_ = ~(self.run_mask | self.stop_mask)
+        categories_[neither_] = np.where(
+            self.short_stop_mask[neither_],
+            self.AT_MAX_CYCLE, self.UNCOUNTED
+        )
+
+        counts_ = np.bincount(categories_, minlength=5)
+        times_ = np.bincount(
+            categories_, weights=self.cycle_times, minlength=5
+        )
+        return counts_, times_
+
+    @cached_property
     def stops(self: ProductInspectData) -> pd.DataFrame:
         """
         Returns all cycles which exceed maximum cycle time.
         """
-        try:
-            return self._stops
-        except AttributeError:
-            self._stops = self.data.query(
-                'cycle_time > @self.process_vars["MAX_CYCLE_TIME_SECONDS"]'
-            )
-            return self._stops
+        return self.data.take(self.stop_positions)
 
-    @property
+    @cached_property
     def run_cycles(self: ProductInspectData) -> pd.DataFrame:
         """
         Returns all cycles which do not exceed maximum cycle time.
         """
-        try:
-            return self._run_cycles
-        except AttributeError:
-            self._run_cycles = self.data.query(
-                'cycle_time < @self.process_vars["MAX_CYCLE_TIME_SECONDS"]'
-            )
-            return self._run_cycles
+        return self.data.take(np.flatnonzero(self.run_mask))
 
-    @property
+    @cached_property
     def total_stop_count(self: ProductInspectData) -> int:
         """
         Returns the number of stops for the given data.
         """
-        try:
-            return self._total_stop_count
-        except AttributeError:
-            self._total_stop_count = len(self.stops.index.values)
-            return self._total_stop_count
+        counts_ = self._cycle_totals[0]
+        return int(counts_[self.SHORT_STOP] + counts_[self.LONG_STOP])
 
-    @property
+    @cached_property
     def total_stop_time(self: ProductInspectData) -> float:
         """
         Returns the sum of cycle times greater than the maximum.
         """
-        try:
-            return self._total_stop_time
-        except AttributeError:
-            self._total_stop_time = sum(self.stops['cycle_time'])
-            return self._total_stop_time
+        times_ = self._cycle_totals[1]
+        return float(times_[self.SHORT_STOP] + times_[self.LONG_STOP])
 
-    @property
+    @cached_property
     def total_run_time(self: ProductInspectData) -> float:
         """
         Returns the sum of cycle times less than the maximum.
         """
-        try:
-            return self._total_run_time
-        except AttributeError:
-            self._total_run_time = sum(self.run_cycles['cycle_time'])
-            return self._total_run_time
+        return float(self._cycle_totals[1][self.RUN_CYCLE])
 
-    @property
+    @cached_property
     def uptime_percentage(self: ProductInspectData) -> float:
         """
         Returns the decimal percentage of uptime for the data.
         """
-        try:
-            return self._uptime_percentage
-        except AttributeError:
-            self._uptime_percentage = (
-                self.total_run_time / self.all_cycle_time
-            )
-            return self._uptime_percentage
+        return (
+            self.total_run_time / self.all_cycle_time
+        )
 
-    @property
+    @cached_property
     def short_stops(self: ProductInspectData) -> pd.DataFrame:
         """
         Returns all stops with duration shorter than SHORT_STOP_LIMIT.
         """
-        try:
-            return self._short_stops
-        except AttributeError:
-            drop_these = pd.concat([
-                self.data.query(
-                    'cycle_time '
-                    '> @self.process_vars["SHORT_STOP_LIMIT_SECONDS"]'
-                ),
-                self.data.query(
-                    'cycle_time '
-                    '< @self.process_vars["MAX_CYCLE_TIME_SECONDS"]'
-                )
-            ]).index
-            self._short_stops = self.data.drop(drop_these).dropna()
-            return self._short_stops
+        return self.data.take(np.flatnonzero(self.short_stop_mask))
 
-    @property
+    @cached_property
     def short_stop_count(self: ProductInspectData) -> int:
         """
         Returns the number of short stops for the data.
         """
-        try:
-            return self._short_stop_count
-        except AttributeError:
-            self._short_stop_count = len(self.short_stops.index)
-            return self._short_stop_count
+        counts_ = self._cycle_totals[0]
+        return int(counts_[self.SHORT_STOP] + counts_[self.AT_MAX_CYCLE])
 
-    @property
+    @cached_property
     def short_stop_time(self: ProductInspectData) -> float:
         """
         Returns the total time in seconds of all short stops.
         """
-        try:
-            return self._short_stop_time
-        except AttributeError:
-            self._short_stop_time = sum(self.short_stops['cycle_time'])
-            return self._short_stop_time
+        times_ = self._cycle_totals[1]
+        return float(times_[self.SHORT_STOP] + times_[self.AT_MAX_CYCLE])
 
-    @property
+    @cached_property
     def long_stops(self: ProductInspectData) -> pd.DataFrame:
         """
         Returns all stops with duration longer than SHORT_STOP_LIMIT.
         """
-        try:
-            return self._long_stops
-        except AttributeError:
-            drop_rows = self.data.query(
-                'cycle_time '
-                '< @self.process_vars["SHORT_STOP_LIMIT_SECONDS"]'
-            ).index
-            self._long_stops = self.data.drop(drop_rows).dropna()
-            return self._long_stops
+        return self.data.take(self.long_stop_positions)
 
-    @property
+    @cached_property
     def long_stop_count(self: ProductInspectData) -> int:
         """
         Returns the number of long stops for the data.
         """
-        try:
-            return self._long_stop_count
-        except AttributeError:
-            self._long_stop_count = len(self.long_stops.index)
-            return self._long_stop_count
+        return int(self._cycle_totals[0][self.LONG_STOP])
 
-    @property
+    @cached_property
     def long_stop_time(self: ProductInspectData) -> float:
         """
         Returns the total time in seconds of all long stops.
         """
-        try:
-            return self._long_stop_time
-        except AttributeError:
-            self._long_stop_time = sum(self.long_stops['cycle_time'])
-        return self._long_stop_time
+        return float(self._cycle_totals[1][self.LONG_STOP])
     # endregion
     ...
 
     # region oee_stats
-    @property
+    @cached_property
+    def _oee(self: ProductInspectData) -> dict[str, float]:
+        """
+        Calculates all OEE values for the data in a single pass,
+        reading each underlying stat only once.
+        """
+        all_cycle_time = self.all_cycle_time
+        part_count = self.part_count
+
+        oee_run_time = self.total_run_time + self.short_stop_time
+        availability_rate = oee_run_time / all_cycle_time
+        performance_rate = (
+            (part_count / oee_run_time)
+            / (self.process_vars['IDEAL_RATE_HZ'] / 60)
+        )
+        quality_rate = 1 - (self.rework_count / part_count)
+
+        return {
+            'oee_run_time': oee_run_time,
+            'availability_rate': availability_rate,
+            'performance_rate': performance_rate,
+            'quality_rate': quality_rate,
+            'oee_rate': availability_rate * performance_rate * quality_rate
+        }
+
+    @cached_property
     def oee_run_time(self: ProductInspectData) -> float:
         """
         Returns OEE Net Run Time, which ignores stops
         with a duration shorter than SHORT_STOP_LIMIT.
         """
-        try:
-            return self._oee_run_time
-        except AttributeError:
-            self._oee_run_time = self.total_run_time + self.short_stop_time
-            return self._oee_run_time
+        return self._oee['oee_run_time']
 
-    @property
+    @cached_property
     def availability_rate(self: ProductInspectData) -> float:
         """
         Returns the OEE Availability Rate for the data
         as a decimal percentage.
         """
-        try:
-            return self._availability_rate
-        except AttributeError:
-            self._availability_rate = (
-                self.oee_run_time
-                / self.all_cycle_time
-            )
-            return self.availability_rate
+        return self._oee['availability_rate']
 
-    @property
+    @cached_property
     def performance_rate(self: ProductInspectData) -> float:
         """
         Returns the OEE Performance Rate for the data
         as a decimal percentage.
         """
-        try:
-            return self._performance_rate
-        except AttributeError:
-            self._performance_rate = (
-                (self.part_count / self.oee_run_time)
-                / (self.process_vars['IDEAL_RATE_HZ'] / 60)
-            )
-            return self._performance_rate
+        return self._oee['performance_rate']
 
-    @property
+    @cached_property
     def quality_rate(self: ProductInspectData) -> float:
         """
         Returns the OEE Quality Rate for the data
@@ -746,31 +1133,48 @@ class ProductInspectData:
         Note: This only accounts for reworks, not rejected pouches.
         It's assumed losses due to melted or crushed product are minimal.
         """
-        try:
-            return self._quality_rate
-        except AttributeError:
-            self._quality_rate = (1 - (self.rework_count / self.part_count))
-            return self._quality_rate
+        return self._oee['quality_rate']
 
-    @property
+    @cached_property
     def oee_rate(self: ProductInspectData) -> float:
         """
         Returns the OEE for the data as a decimal percentage.
         """
-        try:
-            return self._oee_rate
-        except AttributeError:
-            self._oee_rate = (
-                self.availability_rate
-                * self.performance_rate
-                * self.quality_rate
-            )
-            return self._oee_rate
+        return self._oee['oee_rate']
     # endregion
     ...
     # endregion
     ...
 
+    # region interval_stats
+    def interval_stats(
+        self: ProductInspectData, freq: str = 'h'
+    ) -> pd.DataFrame:
+        """
+        Returns cycle, part, rework and stop stats for each interval of
+        the given frequency (default hourly), from a single groupby pass
+        over the block's cached masks.
+        """
+        cycle_times_ = np.nan_to_num(self.cycle_times)
+        short_ = self.short_stop_mask
+        long_ = self.long_stop_mask
+
+        flags_ = pd.DataFrame({
+            'cycle_count': np.ones(self.cycle_count, dtype=np.int64),
+            'part_count': self.part_mask,
+            'rework_count': self.rework_mask,
+            'short_stop_count': short_,
+            'short_stop_time': np.where(short_, cycle_times_, 0.0),
+            'long_stop_count': long_,
+            'long_stop_time': np.where(long_, cycle_times_, 0.0),
+        }, index=self.data.index)
+
+        return flags_.groupby(
+            self.data.index.floor(freq), sort=False
+        ).sum()
+    # endregion
+    ...
+
     # region to_excel
     def stats_to_xls(self: ProductInspectData) -> None:
         """
@@ -783,12 +1187,9 @@ class ProductInspectData:
         if not os.path.exists(folder_):
             os.mkdir(folder_)
 
-        _keys = self.all_stats.keys()
-        _values = self.all_stats.values()
-
         pd.DataFrame(
-            data=_values, columns=[self.__str__()], index=_keys  # type: ignore
-        ).T.to_excel(path_)
+            [self.all_stats], index=[self.__str__()]
+        ).to_excel(path_)
 
     def stops_to_xls(self: ProductInspectData) -> None:
         """
@@ -801,7 +1202,7 @@ class ProductInspectData:
         if not os.path.exists(folder_):
             os.mkdir(folder_)
 
-        self._stops.to_excel(path_)
+        self.stops.to_excel(path_)
     # endregion
     ...
 
@@ -840,44 +1241,47 @@ class ProductInspectData:
             self._start_datetime, self._end_datetime, freq=freq
         )
         range_size = len(datetime_range)
-        columns = ['actual_yield', 'standard_yield', 'rate_Hz']
-        prod_ = pd.DataFrame(
-            data=np.zeros((len(datetime_range), len(columns))),
-            index=datetime_range, columns=columns
-        )
 
-        try:
-            period_length = (
-                pd.Timestamp(prod_.index.values[-1])
-                - pd.Timestamp(prod_.index.values[0])
-            ) / len(prod_)
-        except IndexError:
+        # interval length in seconds, from the int64 nanosecond values
+        range_ns = datetime_range.asi8
+        if range_ns.size < 2:
             raise Exception("Index out of bounds for the given data.")
+        freq_factor = (range_ns[1] - range_ns[0]) / 10 ** 9
 
-        freq_factor = pd.Timedelta(period_length) / pd.Timedelta(seconds=1)
-
-        prod_['standard_yield'] = (
-            np.arange(range_size)
-            * self.process_vars['STANDARD_RATE_HZ']
-            * freq_factor
+        standard_yield = (
+            np.arange(range_size, dtype=np.float64)
+            * (self.process_vars['STANDARD_RATE_HZ'] * freq_factor)
         )
 
-        prod_['actual_yield'] = (
-            self.running_part_count().sort_index().reindex_like(
-                datetime_range.to_series(), method='ffill'
-            ).fillna(0)
+        # running count at the last cycle at or before each interval
+        part_count = self.running_part_count
+        last_cycle = np.searchsorted(
+            self.columns.timestamp_ns, range_ns, side='right'
+        ) - 1
+        actual_yield = np.where(
+            last_cycle >= 0, part_count[last_cycle.clip(min=0)], 0
         )
 
-        prod_['rate_Hz'] = prod_['actual_yield'].diff() / freq_factor
-
-        return prod_
+        rate_Hz = np.empty(range_size, dtype=np.float64)
+        rate_Hz[0] = np.nan
+        np.subtract(actual_yield[1:], actual_yield[:-1], out=rate_Hz[1:])
+        rate_Hz /= freq_factor
+
+        return pd.DataFrame(
+            {
+                'actual_yield': actual_yield,
+                'standard_yield': standard_yield,
+                'rate_Hz': rate_Hz
+            },
+            index=datetime_range
+        )
 
-    def running_part_count(self: ProductInspectData) -> pd.Series:
+    @cached_property
+    def running_part_count(self: ProductInspectData) -> np.ndarray:
         """
-        Returns a Series with a running part count.
+        Returns an array with a running part count at each cycle.
         """
-        self.data['part_count'] = self.data['part_present'].cumsum()
-        return self.data['part_count']
+        return np.cumsum(self.part_mask, dtype=np.int32)
 
     def prod_to_xls(self: ProductInspectData) -> None:
         """
@@ -890,6 +1294,6 @@ class ProductInspectData:
         if not os.path.exists(folder_):
             os.mkdir(folder_)
 
-        self._stops.to_excel(path_)
+        self.stops.to_excel(path_)
     # endregion
     ...
@@ -1,6 +1,8 @@
 import os
 from dotenv import load_dotenv
 
+# never overrides variables already set in the environment, so
+# optional variables set only in .env are still read
 load_dotenv('./.env')
 
 
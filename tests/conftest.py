@@ -0,0 +1,20 @@
+import json
+import os
+import tempfile
+
+# the application package reads its configuration when it is imported,
+# point it at an in-memory database and empty data folders
+_CONFIG_DIR = tempfile.mkdtemp(prefix='qmfg-tools-tests-')
+
+for _name in ('machines', 'products', 'schedule'):
+    with open(f'{_CONFIG_DIR}/{_name}.json', 'w') as _file:
+        json.dump({}, _file)
+
+for _var, _value in {
+    'SECRET_KEY': 'test', 'DATABASE_URL': 'sqlite://', 'DEBUG': 'False',
+    'MACHINES_JSON': f'{_CONFIG_DIR}/machines.json',
+    'PRODUCTS_JSON': f'{_CONFIG_DIR}/products.json',
+    'SCHEDULE_JSON': f'{_CONFIG_DIR}/schedule.json',
+    'PD_PATH': _CONFIG_DIR, 'OUL_PATH': _CONFIG_DIR
+}.items():
+    os.environ.setdefault(_var, _value)
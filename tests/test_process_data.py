@@ -0,0 +1,147 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import pandas as pd
+import pytest
+
+from application.vision import ProcessData
+from application.vision.product_inspect import ProductInspectCamera
+
+PROCESS_DATA_ROWS = (
+    'A100,L200,1001,1,2023-03-01 06:00:00.000\n'
+    'A100,L200,1002,0,2023-03-01 06:00:00.500\n'
+    'A100,L200,1003,1,2023-03-01 06:00:02.000\n'
+)
+
+PYARROW_ENGINE = pytest.param('pyarrow', marks=pytest.mark.skipif(
+    ProcessData.CSV_ENGINE != 'pyarrow',
+    reason='pyarrow engine needs pyarrow and pandas 2.0'
+))
+
+
+@pytest.fixture
+def process_data_file(tmp_path, monkeypatch) -> str:
+    (tmp_path / 'Line7').mkdir()
+    (tmp_path / 'Line7' / 'PR20230301.txt').write_text(PROCESS_DATA_ROWS)
+    monkeypatch.setattr(ProcessData, 'ROOT_PATH', str(tmp_path))
+    monkeypatch.setattr(ProcessData, 'CACHE_DB', None)
+    return 'Line7/PR20230301.txt'
+
+
+def load(target_file: str, usecols: list | None) -> pd.DataFrame:
+    return ProcessData.load(
+        target_file, ProductInspectCamera.RAW_DATA_HEADERS,
+        usecols=usecols, dtype=ProductInspectCamera.RAW_DATA_DTYPES
+    )
+
+
+@pytest.mark.parametrize('engine', ['c', 'pyarrow'])
+def test_load_column_subset(
+    process_data_file: str, monkeypatch, engine: str
+) -> None:
+    # column subsets are read by the c engine whichever engine is set,
+    # so this runs without pyarrow installed
+    monkeypatch.setattr(ProcessData, 'CSV_ENGINE', engine)
+
+    data_ = load(process_data_file, ProductInspectCamera.DATA_COLUMNS)
+
+    assert list(data_.columns) == [
+        'serial_number', 'part_present',
+        'timestamp', 'cycle_time', 'cycle_Hz'
+    ]
+    assert data_['part_present'].dtype == 'int8'
+    assert data_.index[0] == pd.Timestamp('2023-03-01 06:00:00')
+    assert data_['cycle_time'].iloc[1:].tolist() == [0.5, 1.5]
+
+
+@pytest.mark.parametrize('engine', ['c', PYARROW_ENGINE])
+def test_load_all_columns(
+    process_data_file: str, monkeypatch, engine: str
+) -> None:
+    monkeypatch.setattr(ProcessData, 'CSV_ENGINE', engine)
+
+    data_ = load(process_data_file, None)
+
+    assert list(data_.columns) == [
+        'item_number', 'lot_number', 'serial_number', 'part_present',
+        'timestamp', 'cycle_time', 'cycle_Hz'
+    ]
+    assert isinstance(data_['item_number'].dtype, pd.CategoricalDtype)
+    assert data_['part_present'].dtype == 'int8'
+    assert data_['serial_number'].tolist() == [1001, 1002, 1003]
+    assert data_['cycle_time'].iloc[1:].tolist() == [0.5, 1.5]
+
+
+@pytest.fixture
+def cache_db(tmp_path, monkeypatch) -> str:
+    path_ = str(tmp_path / 'cache.db')
+    monkeypatch.setattr(ProcessData, 'CACHE_DB', path_)
+    return path_
+
+
+def cached_paths(cache_db: str) -> list[str]:
+    with closing(sqlite3.connect(cache_db)) as connection_:
+        return [
+            row_[0] for row_ in
+            connection_.execute('SELECT path FROM cached_files')
+        ]
+
+
+def test_cache_round_trip(
+    process_data_file: str, cache_db: str, monkeypatch
+) -> None:
+    stored_ = load(process_data_file, ProductInspectCamera.DATA_COLUMNS)
+
+    def no_source(*args, **kwargs):
+        raise AssertionError('read the source file instead of the cache')
+
+    monkeypatch.setattr(ProcessData, '_read_source', no_source)
+    cached_ = load(process_data_file, ProductInspectCamera.DATA_COLUMNS)
+
+    pd.testing.assert_frame_equal(cached_, stored_)
+
+
+def test_cache_refreshes_changed_file(
+    process_data_file: str, cache_db: str
+) -> None:
+    load(process_data_file, None)
+
+    path_ = f'{ProcessData.ROOT_PATH}/{process_data_file}'
+    with open(path_, 'a') as file_:
+        file_.write('A100,L200,1004,1,2023-03-01 06:00:03.000\n')
+    mtime_ = os.stat(path_).st_mtime_ns + 10 ** 9
+    os.utime(path_, ns=(mtime_, mtime_))
+
+    data_ = load(process_data_file, None)
+
+    assert data_['serial_number'].tolist() == [1001, 1002, 1003, 1004]
+    assert cached_paths(cache_db) == [path_]
+
+
+def test_cache_evicts_unused_files(
+    process_data_file: str, cache_db: str
+) -> None:
+    load(process_data_file, None)
+    old_path_ = f'{ProcessData.ROOT_PATH}/{process_data_file}'
+    with closing(sqlite3.connect(cache_db)) as connection_:
+        connection_.execute(
+            'UPDATE cached_files SET used_at = ?',
+            (time.time() - (ProcessData.CACHE_MAX_DAYS + 1) * 86400,)
+        )
+        connection_.commit()
+
+    new_file_ = 'Line7/PR20230302.txt'
+    with open(f'{ProcessData.ROOT_PATH}/{new_file_}', 'w') as file_:
+        file_.write(PROCESS_DATA_ROWS.replace('03-01', '03-02'))
+    load(new_file_, None)
+
+    assert cached_paths(cache_db) == [f'{ProcessData.ROOT_PATH}/{new_file_}']
+    with closing(sqlite3.connect(cache_db)) as connection_:
+        tables_ = {
+            row_[0] for row_ in connection_.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'"
+            )
+        }
+    assert ProcessData._cached_table(old_path_) not in tables_
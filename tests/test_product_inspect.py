@@ -0,0 +1,197 @@
+import os
+from datetime import datetime as dt
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from application.vision import ProcessData
+from application.vision.product_inspect import (
+    ProductInspectCamera, ProductInspectData
+)
+
+DAY = dt(2023, 3, 1)
+
+
+def write_day(folder, day: dt, cycles: list[tuple[int, int, str]]) -> str:
+    """
+    Writes a process data file with the given (serial number,
+    part present, time) cycles and returns its path.
+    """
+    path_ = folder / f'PR{day:%Y%m%d}.txt'
+    path_.write_text(''.join(
+        f'A100,L200,{serial_},{part_},{day:%Y-%m-%d} {time_}\n'
+        for serial_, part_, time_ in cycles
+    ))
+    return str(path_)
+
+
+def append_cycles(path_: str, cycles: list[tuple[int, int, str]]) -> None:
+    """
+    Appends cycles to a process data file and moves its modification
+    time forward, as the camera does while logging.
+    """
+    with open(path_, 'a') as file_:
+        file_.write(''.join(
+            f'A100,L200,{serial_},{part_},{DAY:%Y-%m-%d} {time_}\n'
+            for serial_, part_, time_ in cycles
+        ))
+    mtime_ = os.stat(path_).st_mtime_ns + 10 ** 9
+    os.utime(path_, ns=(mtime_, mtime_))
+
+
+@pytest.fixture
+def folder(tmp_path, monkeypatch):
+    (tmp_path / 'Line7').mkdir()
+    monkeypatch.setattr(ProcessData, 'ROOT_PATH', str(tmp_path))
+    monkeypatch.setattr(ProcessData, 'CACHE_DB', None)
+    return tmp_path / 'Line7'
+
+
+@pytest.fixture
+def camera() -> ProductInspectCamera:
+    return ProductInspectCamera({'data_folder': 'Line7'})
+
+
+@pytest.fixture
+def loads(monkeypatch) -> list[str]:
+    """
+    Records the files read by ProcessData.load.
+    """
+    loaded_: list[str] = []
+    load_ = ProcessData.load
+
+    def counting_load(target_file, *args, **kwargs):
+        loaded_.append(target_file)
+        return load_(target_file, *args, **kwargs)
+
+    monkeypatch.setattr(ProcessData, 'load', staticmethod(counting_load))
+    return loaded_
+
+
+CYCLES = [
+    (1001, 1, '06:00:00.000'),
+    (1002, 0, '06:00:00.500'),
+    (1002, 1, '06:00:01.000'),
+    (1003, 1, '06:00:03.000'),
+]
+
+
+def test_column_superset_hit(folder, camera, loads) -> None:
+    write_day(folder, DAY, CYCLES)
+
+    camera.load_data(DAY, columns=['serial_number', 'part_present'])
+    data_ = camera.load_data(DAY, columns=['part_present'])
+
+    assert len(loads) == 1
+    assert 'serial_number' not in data_.columns
+    assert data_['part_present'].tolist() == [1, 0, 1, 1]
+
+
+def test_column_subset_reloads_for_more_columns(
+    folder, camera, loads
+) -> None:
+    write_day(folder, DAY, CYCLES)
+
+    camera.load_data(DAY, columns=['part_present'])
+    data_ = camera.load_data(DAY, columns=['serial_number'])
+
+    assert len(loads) == 2
+    assert data_['serial_number'].tolist() == [1001, 1002, 1002, 1003]
+
+
+def test_append_invalidates_day_and_block(folder, camera, loads) -> None:
+    path_ = write_day(folder, DAY, CYCLES)
+    start_, end_ = dt(2023, 3, 1, 6), dt(2023, 3, 1, 7)
+
+    block_ = camera.new_block(start_, end_)
+    assert camera.new_block(start_, end_) is block_
+    assert block_.cycle_count == 4
+    assert len(loads) == 1
+
+    append_cycles(path_, [(1004, 1, '06:00:04.000')])
+
+    reloaded_ = camera.new_block(start_, end_)
+    assert reloaded_ is not block_
+    assert reloaded_.cycle_count == 5
+    assert len(loads) == 2
+    assert len(camera.load_data(DAY).index) == 5
+    assert len(loads) == 2
+
+
+def test_missing_day_returns_none(folder, camera, loads) -> None:
+    write_day(folder, dt(2023, 3, 2), CYCLES)
+
+    assert camera.load_data(DAY) is None
+    assert loads == []
+
+    block_ = camera.new_block(dt(2023, 3, 1, 6), dt(2023, 3, 2, 7))
+    assert block_.cycle_count == 4
+
+
+def test_block_cache_evicts_least_recently_used(
+    folder, camera, monkeypatch
+) -> None:
+    write_day(folder, DAY, CYCLES)
+    monkeypatch.setattr(ProductInspectCamera, 'CACHE_MAX_BLOCKS', 1)
+
+    first_ = camera.new_block(dt(2023, 3, 1, 6), dt(2023, 3, 1, 7))
+    camera.new_block(dt(2023, 3, 1, 6), dt(2023, 3, 1, 8))
+
+    assert camera.new_block(dt(2023, 3, 1, 6), dt(2023, 3, 1, 7)) is not first_
+
+
+def test_combine_categorical_and_extension_columns() -> None:
+    first_ = pd.DataFrame({
+        'lot_number': pd.Categorical(['L1', 'L2', 'L1']),
+        'item_number': pd.Categorical(['A1', 'A1', 'A2']),
+        'count': pd.array([1, None, 3], dtype='Int64'),
+        'label': pd.array(['x', 'y', 'z'], dtype='string'),
+        'cycle_time': [0.5, 1.0, 1.5]
+    }, index=pd.date_range('2023-03-01', periods=3, freq='s'))
+    second_ = pd.DataFrame({
+        'lot_number': pd.Categorical([7, 8]),
+        'item_number': pd.Categorical(['A2', 'A3']),
+        'count': pd.array([4, 5], dtype='Int64'),
+        'label': pd.array(['u', None], dtype='string'),
+        'cycle_time': [2.0, 2.5]
+    }, index=pd.date_range('2023-03-02', periods=2, freq='s'))
+
+    combined_ = ProductInspectCamera._combine_frames([first_, second_])
+
+    assert combined_.index.equals(first_.index.append(second_.index))
+    assert combined_['lot_number'].tolist() == ['L1', 'L2', 'L1', 7, 8]
+    assert isinstance(combined_['item_number'].dtype, pd.CategoricalDtype)
+    assert combined_['item_number'].tolist() == [
+        'A1', 'A1', 'A2', 'A2', 'A3'
+    ]
+    assert combined_['count'].dtype == 'Int64'
+    assert combined_['count'].isna().tolist() == [
+        False, True, False, False, False
+    ]
+    assert combined_['label'].dtype == 'string'
+    assert combined_['cycle_time'].tolist() == [0.5, 1.0, 1.5, 2.0, 2.5]
+
+
+def test_stop_counts_at_the_limits(camera) -> None:
+    # cycles exactly at the max cycle time are neither run cycles nor
+    # stops but count as short stops, stops at the short stop limit
+    # are short and only longer stops are long
+    cycle_times_ = np.array(
+        [np.nan, 0.5, 1.1, 2.0, 120.0, 130.0], dtype=np.float32
+    )
+    data_ = pd.DataFrame({
+        'part_present': np.ones(6, dtype=np.int8),
+        'cycle_time': cycle_times_
+    }, index=pd.date_range('2023-03-01 06:00', periods=6, freq='s'))
+    block_ = ProductInspectData(
+        camera, data_, dt(2023, 3, 1, 6), dt(2023, 3, 1, 7)
+    )
+
+    assert block_.short_stop_count == 3
+    assert block_.short_stop_time == pytest.approx(123.1)
+    assert len(block_.short_stops.index) == 3
+    assert block_.long_stop_count == 1
+    assert block_.total_stop_count == 3
+    assert block_.total_stop_time == pytest.approx(252.0)
+    assert block_.total_run_time == pytest.approx(0.5)